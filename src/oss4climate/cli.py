@@ -3,6 +3,7 @@ CLI module
 """
 
 from datetime import timedelta
+from typing import Optional
 
 import typer
 
@@ -13,19 +14,27 @@ app = typer.Typer()
 
 
 @app.command()
-def add():
-    """Adds a resource to the index
-
-    :param url: URL to add to the index
+def add(
+    urls: Optional[list[str]] = typer.Argument(None),
+    from_file: Optional[str] = typer.Option(None, "--from-file"),
+):
+    """Adds resources to the index (prompting for URLs if none are given)
+
+    :param urls: URLs to add to the index
+    :param from_file: text file with one URL per line to add to the index
     """
-    urls_to_add = []
-    x = "?"
-    while x != "":
-        x = input("Enter URL to be added (ENTER to stop adding): ")
-        # Removing whitespaces
-        x = x.strip()
-        if len(x) > 0:
-            urls_to_add.append(x)
+    urls_to_add = list(urls) if urls else []
+    if from_file is not None:
+        with open(from_file, "r") as f:
+            urls_to_add += [x.strip() for x in f.read().splitlines() if x.strip()]
+    if len(urls_to_add) == 0:
+        x = "?"
+        while x != "":
+            x = input("Enter URL to be added (ENTER to stop adding): ")
+            # Removing whitespaces
+            x = x.strip()
+            if len(x) > 0:
+                urls_to_add.append(x)
     print(f"Adding {urls_to_add}")
     scripts.add_projects_to_listing(urls_to_add)
 
@@ -2,15 +2,18 @@
 Module containing methods to be run in scripts
 """
 
-import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from pathlib import Path
+
+import black
 
 from oss4climate.src.config import (
     FILE_INPUT_INDEX,
     FILE_INPUT_LISTINGS_INDEX,
-    FILE_OUTPUT_SUMMARY_TOML,
+    SETTINGS,
 )
-from oss4climate.src.log import log_info
+from oss4climate.src.log import log_info, log_warning
 from oss4climate.src.parsers import (
     ParsingTargets,
     ResourceListing,
@@ -28,14 +31,31 @@ from oss4climate.src.parsers.opensustain_tech import (
     fetch_listing_of_listings_from_opensustain_webpage,
 )
 
+# Errors raised by black on files that it can not parse as Python (depending on its version)
+_BLACK_PARSING_ERRORS = tuple(
+    getattr(black.parsing, i)
+    for i in ["InvalidInput", "ASTSafetyError", "SourceASTParseError"]
+    if hasattr(black.parsing, i)
+)
+
 
 def format_individual_file(file_path: str) -> None:
-    os.system(f"black {file_path}")
+    # Formatting in-process (instead of starting a new black process for each file)
+    try:
+        black.format_file_in_place(
+            Path(file_path),
+            fast=False,
+            mode=black.Mode(),
+            write_back=black.WriteBack.YES,
+        )
+    except _BLACK_PARSING_ERRORS as e:
+        # Formatting is only cosmetic (the file is left as is if black can not parse it)
+        log_warning(f"Unable to format {file_path} with black ({e})")
 
 
 def format_all_files():
+    # Only formatting the human-edited files (generated files such as the summary are left as exported)
     format_individual_file(FILE_INPUT_INDEX)
-    format_individual_file(FILE_OUTPUT_SUMMARY_TOML)
 
 
 def _add_projects_to_listing_file(
@@ -75,10 +95,15 @@ def discover_projects(
     new_targets = ParsingTargets()
     dropped_urls = []
     rs0 = fetch_all_project_urls_from_lfe_webpage(cache_lifetime=cache_lifetime)
-    for r in rs0:
-        new_targets += fetch_project_github_urls_from_lfe_energy_project_webpage(
-            r, cache_lifetime=cache_lifetime
-        )
+    # Project pages are independent, hence fetched concurrently
+    with ThreadPoolExecutor(max_workers=SETTINGS.SCRAPING_WORKERS) as executor:
+        for r in executor.map(
+            lambda x: fetch_project_github_urls_from_lfe_energy_project_webpage(
+                x, cache_lifetime=cache_lifetime
+            ),
+            rs0,
+        ):
+            new_targets += r
 
     # From landscape
     new_targets += get_open_source_energy_projects_from_landscape(
@@ -93,7 +118,8 @@ def discover_projects(
     # From different listings
     new_targets += listings.fetch_all(listings_file_path, cache_lifetime=cache_lifetime)
 
-    [log_info(f"DROPPING {i} (target is unclear)") for i in dropped_urls]
+    for i in dropped_urls:
+        log_info(f"DROPPING {i} (target is unclear)")
 
     _add_projects_to_listing_file(
         new_targets,
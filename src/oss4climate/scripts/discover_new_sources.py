@@ -4,6 +4,7 @@ This module contains methods to discover new sources of code
 
 import os
 
+import pandas as pd
 from tqdm import tqdm
 
 from oss4climate.src.config import (
@@ -14,7 +15,6 @@ from oss4climate.src.log import (
     log_info,
 )
 from oss4climate.src.model import EnumDocumentationFileType
-from oss4climate.src.nlp.search import SearchResults
 from oss4climate.src.parsers import (
     ParsingTargets,
     fetch_all_project_urls_from_markdown_str,
@@ -52,45 +52,49 @@ def discover_repositories_in_existing_readmes(output_file: str) -> None:
             "The dataset is not available locally - make sure to download it prior to running this"
         )
 
-    dfs = SearchResults(FILE_OUTPUT_LISTING_FEATHER).documents
+    # Only loading the columns used here (the listing holds many large text columns)
+    dfs = pd.read_feather(
+        FILE_OUTPUT_LISTING_FEATHER, columns=["url", "readme", "readme_type"]
+    )
 
     full_targets = ParsingTargets.from_toml(FILE_INPUT_INDEX)
-    for i, r in tqdm(dfs.iterrows()):
+    # Iterating over the columns directly (much faster than building a Series for each row with iterrows)
+    for url, readme, readme_type in tqdm(
+        zip(dfs["url"], dfs["readme"], dfs["readme_type"]), total=len(dfs)
+    ):
         try:
-            if isinstance(r["readme"], str):
-                readme_type = r["readme_type"]
-                if readme_type == EnumDocumentationFileType.MARKDOWN:
-                    full_targets += fetch_all_project_urls_from_markdown_str(
-                        r["readme"]
-                    )
-                elif readme_type == EnumDocumentationFileType.RESTRUCTURED_TEXT:
-                    full_targets += fetch_all_project_urls_from_rst_str(r["readme"])
+            if isinstance(readme, str):
+                # (types are stored as values in the listing)
+                if readme_type == EnumDocumentationFileType.MARKDOWN.value:
+                    full_targets += fetch_all_project_urls_from_markdown_str(readme)
+                elif readme_type == EnumDocumentationFileType.RESTRUCTURED_TEXT.value:
+                    full_targets += fetch_all_project_urls_from_rst_str(readme)
         except Exception as e:
-            print(f"Error with {r} // e={e}")
+            print(f"Error with {url} // e={e}")
 
     def _url_cleanup(x: str) -> str:
-        x = x.split("?")[0]
-        x = x.split("#")[0]
+        # (partition does not build the list of all parts, as split does)
+        x = x.partition("?")[0].partition("#")[0]
         if x.endswith("/"):
             x = x[:-1]
         return x
 
+    def _qualifying_cleaned_urls(x: list[str]) -> list[str]:
+        # Single pass, only keeping the first occurrence of each URL
+        return list(dict.fromkeys(_url_cleanup(i) for i in x if url_qualifies(i)))
+
     # Removing problematic resources
     full_targets.github_organisations = [
         i for i in full_targets.github_organisations if "?" not in i
     ]
-    full_targets.github_repositories = [
-        _url_cleanup(i) for i in full_targets.github_repositories if url_qualifies(i)
-    ]
-    full_targets.gitlab_projects = [
-        _url_cleanup(i) for i in full_targets.gitlab_projects if url_qualifies(i)
-    ]
-    full_targets.unknown = [
-        _url_cleanup(i) for i in full_targets.unknown if url_qualifies(i)
-    ]
-    full_targets.invalid = [
-        _url_cleanup(i) for i in full_targets.invalid if url_qualifies(i)
-    ]
+    full_targets.github_repositories = _qualifying_cleaned_urls(
+        full_targets.github_repositories
+    )
+    full_targets.gitlab_projects = _qualifying_cleaned_urls(
+        full_targets.gitlab_projects
+    )
+    full_targets.unknown = _qualifying_cleaned_urls(full_targets.unknown)
+    full_targets.invalid = _qualifying_cleaned_urls(full_targets.invalid)
 
     # Cleaning up and exporting to TOML file
     log_info("Cleaning up targets")
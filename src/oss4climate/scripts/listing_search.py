@@ -1,7 +1,9 @@
 import os
-from urllib.request import urlretrieve
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
 
 import pandas as pd
+import requests
 
 from oss4climate.src.config import (
     FILE_INPUT_LISTINGS_INDEX,
@@ -21,27 +23,52 @@ from oss4climate.src.nlp.search import SearchResults
 
 def _download_file(url: str, target: str) -> None:
     print(f"Fetching {url}")
-    urlretrieve(url, target)
+    headers = {}
+    if os.path.exists(target):
+        # Conditional request, so that unchanged files are not downloaded again
+        headers["If-Modified-Since"] = formatdate(os.path.getmtime(target), usegmt=True)
+    target_tmp = f"{target}.part"
+    with requests.get(url, headers=headers, stream=True, timeout=60) as r:
+        if r.status_code == 304:
+            print(f"-> {target} is up to date")
+            return
+        r.raise_for_status()
+        with open(target_tmp, "wb") as f:
+            for chunk in r.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+    # Only replacing the file once fully downloaded
+    os.replace(target_tmp, target)
     print(f"-> Downloaded to {target}")
 
 
+def _download_files(urls_and_targets: list[tuple[str, str]]) -> None:
+    # Downloads are independent, hence carried out concurrently
+    with ThreadPoolExecutor(max_workers=len(urls_and_targets)) as executor:
+        for __ in executor.map(lambda x: _download_file(*x), urls_and_targets):
+            pass
+
+
 def download_listing_data_for_app():
     os.makedirs(FILE_OUTPUT_DIR, exist_ok=True)
-    _download_file(URL_LISTINGS_INDEX, FILE_INPUT_LISTINGS_INDEX)
-    _download_file(URL_OPTIMISED_LISTING_FEATHER, FILE_OUTPUT_OPTIMISED_LISTING_FEATHER)
+    _download_files(
+        [
+            (URL_LISTINGS_INDEX, FILE_INPUT_LISTINGS_INDEX),
+            (URL_OPTIMISED_LISTING_FEATHER, FILE_OUTPUT_OPTIMISED_LISTING_FEATHER),
+        ]
+    )
     print("Download complete")
 
 
 def download_data():
     os.makedirs(FILE_OUTPUT_DIR, exist_ok=True)
-    for url_i, file_i in [
-        (URL_RAW_INDEX, FILE_OUTPUT_SUMMARY_TOML),
-        (URL_LISTING_CSV, FILE_OUTPUT_LISTING_CSV),
-        (URL_LISTING_FEATHER, FILE_OUTPUT_LISTING_FEATHER),
-        (URL_OPTIMISED_LISTING_FEATHER, FILE_OUTPUT_OPTIMISED_LISTING_FEATHER),
-    ]:
-        _download_file(url_i, file_i)
-
+    _download_files(
+        [
+            (URL_RAW_INDEX, FILE_OUTPUT_SUMMARY_TOML),
+            (URL_LISTING_CSV, FILE_OUTPUT_LISTING_CSV),
+            (URL_LISTING_FEATHER, FILE_OUTPUT_LISTING_FEATHER),
+            (URL_OPTIMISED_LISTING_FEATHER, FILE_OUTPUT_OPTIMISED_LISTING_FEATHER),
+        ]
+    )
     print("Download complete")
 
 
@@ -51,7 +78,21 @@ def search_in_listing() -> None:
             "The dataset is not available locally - make sure to download it prior to running this"
         )
 
-    x = SearchResults(FILE_OUTPUT_LISTING_FEATHER)
+    # Only reading the columns used by the search (the listing holds no optimised texts)
+    x = SearchResults(
+        FILE_OUTPUT_LISTING_FEATHER,
+        columns=[
+            "name",
+            "organisation",
+            "url",
+            "description",
+            "license",
+            "latest_update",
+            "language",
+            "is_fork",
+            "readme",
+        ],
+    )
     print("Initial number of documents")
     print(x.n_documents)
 
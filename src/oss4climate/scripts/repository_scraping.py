@@ -1,3 +1,8 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Event, Lock
+from typing import Any, Callable, Iterator
+
 import pandas as pd
 from tomlkit import document, dump
 
@@ -9,13 +14,18 @@ from oss4climate.src.config import (
     FILE_OUTPUT_LISTING_FEATHER,
     FILE_OUTPUT_OPTIMISED_LISTING_FEATHER,
     FILE_OUTPUT_SUMMARY_TOML,
+    SETTINGS,
+)
+from oss4climate.src.helpers import (
+    sorted_list_of_cleaned_urls,
+    sorted_list_of_unique_elements,
 )
-from oss4climate.src.helpers import sorted_list_of_unique_elements
 from oss4climate.src.log import log_info, log_warning
 from oss4climate.src.model import EnumDocumentationFileType
 from oss4climate.src.nlp import html_io, markdown_io, rst_io
 from oss4climate.src.nlp.plaintext import (
     get_spacy_english_model,
+    reduce_many_to_informative_lemmas,
     reduce_to_informative_lemmas,
 )
 from oss4climate.src.parsers import (
@@ -26,6 +36,81 @@ from oss4climate.src.parsers import (
 )
 
 
+def _fetch_concurrently(
+    f: Callable[[str], Any],
+    urls: list[str],
+    n_workers: int = 1,
+    max_rate_limit_errors: int | None = None,
+) -> Iterator[tuple[str, Any, Exception | None]]:
+    """Fetches the details of all URLs with a pool of threads (as fetching is bound by network latency)
+
+    :param f: function fetching the details of a URL
+    :param urls: URLs to fetch
+    :param n_workers: number of threads, defaults to 1
+    :param max_rate_limit_errors: number of rate limit errors after which remaining URLs are skipped, defaults to None (no limit)
+    :return: iterator of (url, details, error) in the same order as the URLs
+    """
+    rate_limit_hit = Event()
+    lock = Lock()
+    n_rate_limit_errors = 0
+
+    def _f(url: str) -> tuple[str, Any, Exception | None]:
+        nonlocal n_rate_limit_errors
+        if rate_limit_hit.is_set():
+            return url, None, RateLimitError(f"Skipped after rate limiting ({url})")
+        try:
+            return url, f(url), None
+        except Exception as e:
+            if isinstance(e, RateLimitError) and (max_rate_limit_errors is not None):
+                with lock:
+                    n_rate_limit_errors += 1
+                    if n_rate_limit_errors > max_rate_limit_errors:
+                        rate_limit_hit.set()
+            return url, None, e
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        yield from executor.map(_f, urls)
+
+
+def _n_text_processes() -> int:
+    n = SETTINGS.NLP_PROCESSES
+    if n is None:
+        # (cpu_count returns None if the number of CPUs can not be determined)
+        n = max(1, (os.cpu_count() or 2) - 1)
+    return n
+
+
+def _readme_cleanup(x: Any, x_type: str) -> tuple[str, Exception | None]:
+    # Defined at module level, so that it can be run in a process pool (returning the RST parsing error, if any)
+    if x is None:
+        return "(NO DATA)", None
+    elif not isinstance(x, str):
+        return "(INVALID)", None
+    if x_type == EnumDocumentationFileType.MARKDOWN.value:
+        out = markdown_io.markdown_to_search_plaintext(
+            x,
+            remove_code=True,
+        )
+    elif x_type == EnumDocumentationFileType.HTML.value:
+        out = html_io.html_to_search_plaintext(
+            x,
+            remove_code=True,
+        )
+    elif x_type == EnumDocumentationFileType.RESTRUCTURED_TEXT.value:
+        try:
+            out = rst_io.rst_to_search_plaintext(
+                x,
+                remove_code=True,
+            )
+        except rst_io.RstParsingError as e:
+            # This is to avoid issues if the text is not markdown
+            return x, e
+    else:
+        # This is to avoid issues if the text is not markdown
+        out = x
+    return out, None
+
+
 def scrape_all(
     target_output_file: str = FILE_OUTPUT_LISTING_CSV,
     fail_on_issue=False,
@@ -44,7 +129,11 @@ def scrape_all(
 
     log_info("Loading organisations and repositories to be indexed")
     targets = ParsingTargets.from_toml(FILE_INPUT_INDEX)
-    targets.ensure_sorted_cleaned_and_unique_elements()
+    # Only organisations and groups are cleaned here (all other targets are cleaned once, after these are expanded)
+    targets.github_organisations = sorted_list_of_cleaned_urls(
+        targets.github_organisations
+    )
+    targets.gitlab_groups = sorted_list_of_cleaned_urls(targets.gitlab_groups)
 
     failure_during_scraping = False
 
@@ -53,38 +142,49 @@ def scrape_all(
     bad_organisations = []
     bad_repositories = []
 
-    log_info("Fetching data for all organisations in Github")
-    for org_url in targets.github_organisations:
-        url2check = org_url.replace("https://", "")
-        if url2check.endswith("/"):
-            url2check = url2check[:-1]
+    n_workers = SETTINGS.SCRAPING_WORKERS
+
+    def _is_repository_url(org_url: str) -> bool:
+        url2check = org_url.removeprefix("https://").removesuffix("/")
         if url2check.count("/") > 1:
             log_info(f"SKIPPING repo {org_url}")
-            targets.github_repositories.append(org_url)  # Mapping it to repos instead
-            continue  # Skip
+            return True
+        return False
 
-        try:
-            x = github_data_io.fetch_repositories_in_organisation(org_url)
-            [targets.github_repositories.append(i) for i in x.values()]
-        except Exception as e:
+    log_info("Fetching data for all organisations in Github")
+    github_organisations = []
+    for org_url in targets.github_organisations:
+        if _is_repository_url(org_url):
+            targets.github_repositories.append(org_url)  # Mapping it to repos instead
+        else:
+            github_organisations.append(org_url)
+    for org_url, x, e in _fetch_concurrently(
+        github_data_io.fetch_repositories_in_organisation,
+        github_organisations,
+        n_workers=n_workers,
+    ):
+        if e is None:
+            targets.github_repositories.extend(x.values())
+        else:
             scrape_failures["GITHUB_ORGANISATION:" + org_url] = e
             log_warning(f" > Error with organisation ({e})")
             bad_organisations.append(org_url)
 
     log_info("Fetching data for all groups in Gitlab")
+    gitlab_groups = []
     for org_url in targets.gitlab_groups:
-        url2check = org_url.replace("https://", "")
-        if url2check.endswith("/"):
-            url2check = url2check[:-1]
-        if url2check.count("/") > 1:
-            log_info(f"SKIPPING repo {org_url}")
+        if _is_repository_url(org_url):
             targets.gitlab_projects.append(org_url)  # Mapping it to repos instead
-            continue  # Skip
-
-        try:
-            x = gitlab_data_io.fetch_repositories_in_group(org_url)
-            [targets.gitlab_projects.append(i) for i in x.values()]
-        except Exception as e:
+        else:
+            gitlab_groups.append(org_url)
+    for org_url, x, e in _fetch_concurrently(
+        gitlab_data_io.fetch_repositories_in_group,
+        gitlab_groups,
+        n_workers=n_workers,
+    ):
+        if e is None:
+            targets.gitlab_projects.extend(x.values())
+        else:
             scrape_failures["GITLAB_GROUP:" + org_url] = e
             log_warning(f" > Error with organisation ({e})")
             bad_organisations.append(org_url)
@@ -93,12 +193,16 @@ def scrape_all(
     screening_results = []
 
     log_info("Fetching data for all repositories in Gitlab")
-    for i in targets.gitlab_projects:
-        try:
-            screening_results.append(
-                gitlab_data_io.fetch_repository_details(i, fail_on_issue=fail_on_issue)
-            )
-        except Exception as e:
+    for i, x, e in _fetch_concurrently(
+        lambda i: gitlab_data_io.fetch_repository_details(
+            i, fail_on_issue=fail_on_issue
+        ),
+        targets.gitlab_projects,
+        n_workers=n_workers,
+    ):
+        if e is None:
+            screening_results.append(x)
+        else:
             scrape_failures["GITLAB_PROJECT:" + i] = e
             log_warning(f" > Error with repo ({e})")
             bad_repositories.append(i)
@@ -106,16 +210,17 @@ def scrape_all(
     log_info("Fetching data for all repositories in Github")
     try:
         forbidden_for_api_limit_counter = 0
-        for i in targets.github_repositories:
-            try:
-                if i.endswith("/.github"):
-                    continue
-                screening_results.append(
-                    github_data_io.fetch_repository_details(
-                        i, fail_on_issue=fail_on_issue
-                    )
-                )
-            except Exception as e:
+        for i, x, e in _fetch_concurrently(
+            lambda i: github_data_io.fetch_repository_details(
+                i, fail_on_issue=fail_on_issue
+            ),
+            [i for i in targets.github_repositories if not i.endswith("/.github")],
+            n_workers=n_workers,
+            max_rate_limit_errors=10,
+        ):
+            if e is None:
+                screening_results.append(x)
+            else:
                 if isinstance(e, RateLimitError):
                     # Ensuring proper breaking on rate limits of the API
                     forbidden_for_api_limit_counter += 1
@@ -142,49 +247,37 @@ def scrape_all(
         return out
 
     df = pd.DataFrame([_f_fix(i) for i in screening_results])
-    df2export = df.set_index("id").drop(columns=["raw_details"])
-
-    # Cleaning up markdown
-    def _f_readme_cleanup(r):
-        x = r["readme"]
-        if x is None:
-            return "(NO DATA)"
-        elif not isinstance(x, str):
-            return "(INVALID)"
-        x_type = r["readme_type"]
-        if x_type == EnumDocumentationFileType.MARKDOWN.value:
-            out = markdown_io.markdown_to_search_plaintext(
-                x,
-                remove_code=True,
+    # Low cardinality columns are stored as categories (smaller exports and fast unique values)
+    categorical_cols = ["language", "organisation", "license"]
+    df[categorical_cols] = df[categorical_cols].astype("category")
+    df2export = df.set_index("id")
+    df2export.drop(columns=["raw_details"], inplace=True)
+
+    # Cleaning up markdown (in parallel, as the conversions are CPU-bound)
+    with ProcessPoolExecutor(max_workers=_n_text_processes()) as executor:
+        cleaned_readmes = list(
+            executor.map(
+                _readme_cleanup,
+                df2export["readme"],
+                df2export["readme_type"],
+                chunksize=64,
             )
-        elif x_type == EnumDocumentationFileType.HTML.value:
-            out = html_io.html_to_search_plaintext(
-                x,
-                remove_code=True,
-            )
-        elif x_type == EnumDocumentationFileType.RESTRUCTURED_TEXT.value:
-            try:
-                out = rst_io.rst_to_search_plaintext(
-                    x,
-                    remove_code=True,
-                )
-            except rst_io.RstParsingError as e:
-                scrape_failures[f"RST_PARSING:{r['url']}"] = e
-                # This is to avoid issues if the text is not markdown
-                out = x
-        else:
-            # This is to avoid issues if the text is not markdown
-            out = x
-        return out
-
-    df2export["readme"] = df2export.apply(_f_readme_cleanup, axis=1)
+        )
+    df2export["readme"] = [out for out, __ in cleaned_readmes]
+    for url, (__, e) in zip(df2export["url"], cleaned_readmes):
+        if e is not None:
+            scrape_failures[f"RST_PARSING:{url}"] = e
 
     # Dropping duplicates, if any
     df2export.drop_duplicates(subset=["url"], inplace=True)
 
     if target_output_file.endswith(".csv"):
         # Dropping READMEs for CSV to look reasonable
-        df.drop(columns=["readme"]).to_csv(target_output_file, sep=";")
+        df.to_csv(
+            target_output_file,
+            sep=";",
+            columns=[i for i in df.columns if i != "readme"],
+        )
     elif target_output_file.endswith(".json"):
         df2export.T.to_json(target_output_file)
     else:
@@ -207,9 +300,16 @@ def scrape_all(
     )
 
     # Outputting details to a new TOML
-    languages = sorted_list_of_unique_elements(df["language"])
-    organisations = sorted_list_of_unique_elements(df["organisation"])
-    licences = sorted_list_of_unique_elements(df["license"])
+    def _sorted_unique_values(x: pd.Series) -> list:
+        # Categories are unique already (missing values are not categories, and are listed last as before)
+        out = sorted_list_of_unique_elements(x.cat.categories.to_series())
+        if x.isna().any():
+            out.append(None)
+        return out
+
+    languages = _sorted_unique_values(df["language"])
+    organisations = _sorted_unique_values(df["organisation"])
+    licences = _sorted_unique_values(df["license"])
 
     stats = {
         "repositories": len(df),
@@ -247,7 +347,6 @@ def scrape_all(
     log_info(f"Exporting failures to {file_failures_toml}")
     with open(file_failures_toml, "w") as fp:
         dump(doc_failures, fp, sort_keys=True)
-    scripts.format_individual_file(file_failures_toml)
 
     if failure_during_scraping:
         log_warning("Failure(s) happened during the scraping!")
@@ -261,11 +360,10 @@ def optimise_scraped_data_for_search():
     log_info("- Loaded")
 
     log_info("Loading input listing")
-    df = pd.read_feather(FILE_OUTPUT_LISTING_FEATHER)
+    # (not copied, as the loaded listing is only used to build the optimised one)
+    df_opt = pd.read_feather(FILE_OUTPUT_LISTING_FEATHER)
     log_info("- Loaded")
 
-    df_opt = df.copy()
-
     def _f_opt(x: str | None) -> str | None:
         if x is None:
             return None
@@ -276,13 +374,36 @@ def optimise_scraped_data_for_search():
             out = "(OPTIMISATION ERROR)"
         return out
 
+    n_process = _n_text_processes()
+
+    def _f_opt_all(x: pd.Series) -> list[str | None]:
+        # Lemmatising all texts in batches (and only falling back to one at a time on errors)
+        # Duplicate texts (e.g. READMEs of forks) are only lemmatised once
+        try:
+            unique_texts = list(dict.fromkeys(i for i in x if i is not None))
+            lemmas = reduce_many_to_informative_lemmas(
+                unique_texts,
+                nlp_model=nlp_model,
+                batch_size=64,
+                n_process=n_process,
+            )
+            optimised = {t: " ".join(i) for t, i in zip(unique_texts, lemmas)}
+            out = [None if i is None else optimised[i] for i in x]
+        except Exception as e:
+            log_warning(f"Batch lemmatisation error ({e}), optimising one at a time")
+            out = [_f_opt(i) for i in x]
+        return out
+
     log_info("Optimising descriptions")
-    df_opt["optimised_description"] = df_opt["description"].apply(_f_opt)
+    df_opt["optimised_description"] = _f_opt_all(df_opt["description"])
     log_info("Optimising readmes")
-    df_opt["optimised_readme"] = df_opt["readme"].apply(_f_opt)
+    df_opt["optimised_readme"] = _f_opt_all(df_opt["readme"])
 
     log_info("Exporting input listing")
-    df_opt.to_feather(FILE_OUTPUT_OPTIMISED_LISTING_FEATHER)
+    # (zstd compresses the lemmatised texts much better than the default lz4)
+    df_opt.to_feather(
+        FILE_OUTPUT_OPTIMISED_LISTING_FEATHER, compression="zstd", compression_level=6
+    )
     log_info("- Exported")
 
 
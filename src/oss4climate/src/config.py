@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Optional
 
 import pydantic_settings
@@ -14,9 +15,15 @@ class Settings(pydantic_settings.BaseSettings):
     EXPORT_FTP_URL: Optional[str] = None
     EXPORT_FTP_USER: Optional[str] = None
     EXPORT_FTP_PASSWORD: Optional[str] = None
+    # Number of threads fetching repository details concurrently when scraping
+    SCRAPING_WORKERS: int = 4
+    # Number of processes used for text processing of the listing (all cores but one if None)
+    NLP_PROCESSES: Optional[int] = None
     # App settings
     DATA_REFRESH_KEY: Optional[str] = None
     SENTRY_DSN_URL: Optional[str] = None
+    # Number of processes used to index the documents at app start (keep at 1 on hosts with little memory)
+    APP_INDEXING_WORKERS: int = 1
 
     model_config = pydantic_settings.SettingsConfigDict(
         env_file_encoding="utf-8",
@@ -34,10 +41,18 @@ class Settings(pydantic_settings.BaseSettings):
         return f"{self.LOCAL_FOLDER}/{self.APP_SQLITE_DB}"
 
 
-# Loading settings
-load_dotenv(override=True)
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Loads the settings (from environment and .env file) once
+
+    :return: settings (call get_settings.cache_clear() to load these again)
+    """
+    load_dotenv(override=True)
+    return Settings()
 
-SETTINGS = Settings()
+
+# Loading settings
+SETTINGS = get_settings()
 
 
 # Link to all documents
@@ -5,8 +5,10 @@ Module to manage a database input
 import json
 import os
 from datetime import UTC, datetime, timedelta
+from typing import Any
 
-from sqlmodel import Field, Session, SQLModel, create_engine, delete, select
+from sqlalchemy import event, insert
+from sqlmodel import Field, Session, SQLModel, create_engine
 
 from oss4climate.src.config import SETTINGS
 from oss4climate.src.log import log_info
@@ -26,6 +28,22 @@ class Cache(SQLModel, table=True):
 # -------------------------------------------------------------------------------------
 
 
+_SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",  # Readers do not block the writer (and fewer syncs to disk)
+    "PRAGMA synchronous=NORMAL",  # Safe with WAL (only the latest writes may be lost on power loss)
+    "PRAGMA cache_size=-65536",  # 64 MB of page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MB
+]
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for i in _SQLITE_PRAGMAS:
+        cursor.execute(i)
+    cursor.close()
+
+
 def _open_engine_and_create_database_if_missing():
     db_path = SETTINGS.path_scraping_sqlite_db
     db_folder, __ = os.path.split(db_path)
@@ -33,7 +51,12 @@ def _open_engine_and_create_database_if_missing():
     x = create_engine(
         f"sqlite:///{db_path}",
         echo=False,
+        # Pooled connections are shared by the threads fetching data concurrently
+        connect_args={"check_same_thread": False},
+        pool_size=5,
+        max_overflow=10,
     )
+    event.listen(x, "connect", _set_sqlite_pragmas)
     SQLModel.metadata.create_all(x)
     return x
 
@@ -54,30 +77,49 @@ def load_from_database(
     cache_lifetime: timedelta | None = None,
 ) -> dict | None:
     with Session(_ENGINE) as session:
-        res = session.exec(select(Cache).where(Cache.id == key)).first()
+        # Direct lookup on the primary key
+        res = session.get(Cache, key)
         if res is None:
             return None
+        if cache_lifetime is not None:
+            # Shortcircuit in case cache is too old
+            if res.fetched_at.astimezone(UTC) <= __now() - cache_lifetime:
+                session.delete(res)
+                session.commit()
+                log_info(f"Dropped expired cache for {key}")
+                return None
+
+        if is_json:
+            return json.loads(res.value)
         else:
-            if cache_lifetime is not None:
-                # Shortcircuit in case cache is too old
-                if res.fetched_at.astimezone(UTC) <= __now() - cache_lifetime:
-                    session.exec(delete(Cache).where(Cache.id == key))
-                    session.commit()
-                    log_info(f"Dropped expired cache for {key}")
-                    return None
-
-            if is_json:
-                return json.loads(res.value)
-            else:
-                return res.value
+            return res.value
+
+
+def _json_dumps(value: Any) -> str:
+    # Compact separators (smaller rows for large API payloads, read back identically)
+    return json.dumps(value, separators=(",", ":"))
+
+
+def save_many_to_database(items: list[tuple[str, Any, bool]]) -> None:
+    """Saves many values to the database in a single transaction (replacing existing values)
+
+    :param items: list of (key, value, is_json)
+    """
+    if len(items) == 0:
+        return
+    fetched_at = __now()
+    rows = [
+        {
+            "id": key,
+            "value": _json_dumps(value) if is_json else value,
+            "fetched_at": fetched_at,
+        }
+        for key, value, is_json in items
+    ]
+    with Session(_ENGINE) as session:
+        session.exec(insert(Cache).prefix_with("OR REPLACE"), params=rows)
+        session.commit()
 
 
 def save_to_database(key: str, value: dict, is_json: bool) -> None:
-    if is_json:
-        value_to_write = json.dumps(value)
-    else:
-        value_to_write = value
-
-    with Session(_ENGINE) as session:
-        session.add(Cache(id=key, value=value_to_write, fetched_at=__now()))
-        session.commit()
+    save_many_to_database([(key, value, is_json)])
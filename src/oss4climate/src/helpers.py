@@ -8,42 +8,78 @@ from urllib.parse import urlparse
 import pandas as pd
 
 
+def _is_missing(x: Any) -> bool:
+    # (covers None, NaN and pd.NA, for scalars only)
+    return pd.api.types.is_scalar(x) and pd.isna(x)
+
+
 def sorted_list_of_unique_elements(x: list | pd.Series):
     if isinstance(x, list):
-        s = pd.Series(x)
+        unique_values = set(x)
     elif isinstance(x, pd.Series):
-        s = x
+        unique_values = set(x.unique())
     else:
         raise TypeError("Input must be list or pandas.Series")
-    return list(s.sort_values().unique())
+    out = sorted(i for i in unique_values if not _is_missing(i))
+    # Missing values are placed last (as done by pandas when sorting)
+    missing = [i for i in unique_values if _is_missing(i)]
+    if missing:
+        out.append(missing[0])
+    return out
+
+
+def _end_of_url_part(url: str, start: int, delimiters: str) -> int:
+    # Position of the first delimiter found after start (or length of the url)
+    end = len(url)
+    for d in delimiters:
+        i = url.find(d, start)
+        if -1 < i < end:
+            end = i
+    return end
 
 
 def url_base_matches_domain(url: str, domain: str) -> bool:
+    if url.startswith(("https://", "http://")) and not any(
+        c in url for c in "[]\t\r\n"
+    ):
+        # Fast path for plain web URLs (slicing the network location instead of parsing with urlparse)
+        i_netloc = url.index("://") + 3
+        return url[i_netloc : _end_of_url_part(url, i_netloc, "/?#")] == domain
     parsed_url = urlparse(url)
     return parsed_url.netloc == domain
 
 
 def cleaned_url(url: str) -> str:
-    parsed_url = urlparse(url)
-
-    out = f"{parsed_url.scheme}://{parsed_url.hostname}{parsed_url.path}"
+    out = None
+    if url.startswith(("https://", "http://")) and not any(
+        c in url for c in "@[]\t\r\n"
+    ):
+        # Fast path for plain web URLs (slicing the string instead of parsing it with urlparse)
+        i_host = url.index("://") + 3
+        i_path = _end_of_url_part(url, i_host, "/?#")
+        hostname = url[i_host:i_path].partition(":")[0]
+        # (other hostnames are further checked and normalised by urlparse)
+        if hostname.isascii() and "%" not in hostname:
+            path = url[i_path : _end_of_url_part(url, i_path, "?#")]
+            if ";" in path:
+                # Parameters of the last segment are not part of the path
+                i_params = path.find(";", max(path.rfind("/"), 0))
+                if i_params > -1:
+                    path = path[:i_params]
+            out = f"{url[:i_host]}{hostname.lower() or None}{path}"
+    if out is None:
+        parsed_url = urlparse(url)
+        out = f"{parsed_url.scheme}://{parsed_url.hostname}{parsed_url.path}"
     if " " in out:
         out = out.split(" ")[0]
     return out
 
 
 def sorted_list_of_cleaned_urls(urls: list[str]) -> list[str]:
-    return sorted_list_of_unique_elements([cleaned_url(i) for i in urls])
+    # Each distinct URL is only cleaned once (lists of targets hold many duplicates)
+    return sorted({cleaned_url(i) for i in set(urls)})
 
 
 def get_key_of_maximum_value(x: dict[Any, float | int]) -> Any:
-    max_value = None
-    max_key = None
-    for k, v in x.items():
-        if max_value is None:
-            max_value = v
-            max_key = k
-        if max_value < v:
-            max_value = v
-            max_key = k
-    return max_key
+    # (the first key is returned in case of ties, and None for an empty dict)
+    return max(x, key=x.get) if x else None
@@ -2,10 +2,17 @@
 Module for text classification
 """
 
+from typing import Any
+
 import pandas as pd
 
 
-def tf_idf(documents: list[str]) -> pd.DataFrame:
+def fit_tf_idf(documents: list[str]) -> tuple[Any, Any]:
+    """Fits a TF-IDF model on documents
+
+    :param documents: texts of the documents
+    :return: fitted TfidfVectorizer and sparse TF-IDF matrix (documents x vocabulary)
+    """
     from sklearn.feature_extraction.text import TfidfVectorizer
 
     # Initialize TfidfVectorizer
@@ -13,9 +20,15 @@ def tf_idf(documents: list[str]) -> pd.DataFrame:
 
     # Learn the vocabulary and transform the documents into a TF-IDF matrix
     tf_idf_matrix = vectorizer.fit_transform(documents)
+    return vectorizer, tf_idf_matrix
+
+
+def tf_idf(documents: list[str]) -> pd.DataFrame:
+    vectorizer, tf_idf_matrix = fit_tf_idf(documents)
 
     # Get the vocabulary (unique words) and their corresponding indices
     vocabulary = vectorizer.get_feature_names_out()
 
-    df = pd.DataFrame(tf_idf_matrix.todense().T, index=vocabulary).T
+    # Kept sparse (a dense matrix of documents x vocabulary would not fit in memory for large corpora)
+    df = pd.DataFrame.sparse.from_spmatrix(tf_idf_matrix, columns=vocabulary)
     return df
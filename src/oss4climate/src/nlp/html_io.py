@@ -1,22 +1,45 @@
 import re
+from html.parser import HTMLParser
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, UnicodeDammit
 
-from oss4climate.src.log import log_warning
+_CODE_RE = re.compile(r"<code\b[^>]*>.*?</code\s*>", re.IGNORECASE | re.DOTALL)
+_PRE_RE = re.compile(r"<pre\b[^>]*>.*?</pre\s*>", re.IGNORECASE | re.DOTALL)
 
 
-def find_all_links_in_html(html_str: str) -> list[str]:
-    b = BeautifulSoup(html_str, features="html.parser")
-    rs = b.findAll(name="a")
-    return [x.get("href") for x in rs]
+class _LinksParser(HTMLParser):
+    # Only collecting the links (without building a tree, as BeautifulSoup does on the same tokenizer)
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = None
+            for k, v in attrs:
+                if k == "href":
+                    href = "" if v is None else v
+            self.links.append(href)
+
+
+def find_all_links_in_html(html_str: str | bytes) -> list[str]:
+    if isinstance(html_str, bytes):
+        # Decoding as BeautifulSoup does (using the declared encoding, if any)
+        html_str = UnicodeDammit(html_str, is_html=True).unicode_markup
+    parser = _LinksParser()
+    parser.feed(html_str)
+    parser.close()
+    return parser.links
 
 
-def html_to_search_plaintext(html_str: str, remove_code: bool = True) -> list[str]:
+def html_to_search_plaintext(html_str: str | bytes, remove_code: bool = True) -> str:
+    if isinstance(html_str, bytes):
+        # Decoding as BeautifulSoup does (using the declared encoding, if any)
+        html_str = UnicodeDammit(html_str, is_html=True).unicode_markup
+    if not isinstance(html_str, str):
+        return ""
     if remove_code:
-        try:
-            html_str = re.sub(r"<code>(.*?)</code >", " ", html_str)
-            html_str = re.sub(r"<pre>(.*?)</pre>", " ", html_str)
-        except TypeError:
-            log_warning("Unable to remove code from HTML")
+        html_str = _CODE_RE.sub(" ", html_str)
+        html_str = _PRE_RE.sub(" ", html_str)
     b = BeautifulSoup(html_str, features="html.parser")
     return b.get_text(separator=" ")
@@ -8,17 +8,19 @@ from markdown import markdown
 
 from oss4climate.src.nlp.html_io import html_to_search_plaintext
 
+# Regex patterns compiled once (as these are used on every README)
+_MD_LINK_SUB_RE = re.compile(r"\[([^\]]+)\]\(.*?\)")
+_MD_LINK_FIND_RE = re.compile(r"\[([^\]]+)\]\(([^\)]+)\)|\[([^\]]+)\]\s*\[([^\]]*)\]")
+_WHITESPACES_RE = re.compile(r"\s+")
 
-def _replace_markdown_links(text):
-    # Regex pattern to match markdown links
-    pattern = r"\[([^\]]+)\]\(.*?\)"
 
+def _replace_markdown_links(text):
     # Replacement function to keep only the link text
     def repl(match):
         return match.group(1)
 
     # Use the sub method to replace the links
-    result = re.sub(pattern, repl, text)
+    result = _MD_LINK_SUB_RE.sub(repl, text)
 
     return result
 
@@ -26,13 +28,12 @@ def _replace_markdown_links(text):
 def _fix_titles_and_multiple_spaces(text: str) -> str:
     # Use the sub method to replace the links
     result = text.replace("#", " ")
-    result = re.sub(r"\s+", " ", result)
+    result = _WHITESPACES_RE.sub(" ", result)
     return result
 
 
 def find_all_links_in_markdown(markdown_text: str) -> list[str]:
-    pattern = r"\[([^\]]+)\]\(([^\)]+)\)|\[([^\]]+)\]\s*\[([^\]]*)\]"
-    out = re.findall(pattern, markdown_text)
+    out = _MD_LINK_FIND_RE.findall(markdown_text)
     return [i[1] for i in out]
 
 
@@ -48,9 +49,4 @@ def markdown_to_search_plaintext(
     if md_str is None:
         return None
     html = markdown(md_str)
-
-    if remove_code:
-        html = re.sub(r"<code>(.*?)</code >", " ", html)
-        html = re.sub(r"<pre>(.*?)</pre>", " ", html)
-
-    return html_to_search_plaintext(html)
+    return html_to_search_plaintext(html, remove_code=remove_code)
@@ -1,7 +1,11 @@
 import re
+from functools import lru_cache
+from typing import Iterable, Iterator
 
 
+@lru_cache(maxsize=2)
 def get_spacy_english_model(minimal: bool = True):
+    # Loaded once per configuration (the model is shared by all callers, so it must not be modified)
     try:
         import en_core_web_sm
     except ImportError:
@@ -32,25 +36,60 @@ def remove_linebreaks_and_excess_spaces(txt: str) -> str:
     return txt
 
 
+# URLs with a scheme (without trailing punctuation, e.g. at the end of a sentence)
+_URL_RE = re.compile(
+    r"\b[a-zA-Z][a-zA-Z0-9+.-]*://[^\s<>\"'`()\[\]]*[^\s<>\"'`()\[\].,;:!?]"
+)
+
+
 def _f_token_is_url(token) -> bool:
     return token.like_url and ("://" in token.text)
 
 
-def extract_urls(txt: str, nlp_model=None) -> list[str]:
+def extract_urls(txt: str, nlp_model=None, use_nlp: bool = False) -> list[str]:
+    """Extracts the URLs from a text
+
+    :param txt: text
+    :param nlp_model: spaCy model (only used if use_nlp), defaults to None (loading the english model)
+    :param use_nlp: whether to find URLs among the tokens of the spaCy model instead of with a regex, defaults to False
+    :return: list of URLs (in order of appearance)
+    """
+    if not use_nlp:
+        return _URL_RE.findall(txt)
     if nlp_model is None:
         nlp_model = get_spacy_english_model()
     urls = [token.text for token in nlp_model(txt) if _f_token_is_url(token)]
     return urls
 
 
+def _informative_lemmas_of_doc(doc) -> list[str]:
+    def _f_useful_filter(token):
+        return not (token.is_stop or token.is_punct or token.like_num)
+
+    return list(map(lambda token: token.lemma_, filter(_f_useful_filter, doc)))
+
+
 def reduce_to_informative_lemmas(txt: str, nlp_model=None) -> list[str]:
     if nlp_model is None:
         nlp_model = get_spacy_english_model()
+    return _informative_lemmas_of_doc(nlp_model(txt))
 
-    def _f_useful_filter(token):
-        return not (token.is_stop or token.is_punct or token.like_num)
 
-    cleaned_lemmas = list(
-        map(lambda token: token.lemma_, filter(_f_useful_filter, nlp_model(txt)))
-    )
-    return cleaned_lemmas
+def reduce_many_to_informative_lemmas(
+    txts: Iterable[str],
+    nlp_model=None,
+    batch_size: int = 256,
+    n_process: int = 1,
+) -> Iterator[list[str]]:
+    """Same as reduce_to_informative_lemmas, but processing the texts in batches (much faster on many texts)
+
+    :param txts: texts to reduce
+    :param nlp_model: spaCy model, defaults to None (loading the english model)
+    :param batch_size: number of texts per batch, defaults to 256
+    :param n_process: number of processes used by spaCy, defaults to 1
+    :return: iterator over the lemmas of each text (in the same order as the texts)
+    """
+    if nlp_model is None:
+        nlp_model = get_spacy_english_model()
+    for doc in nlp_model.pipe(txts, batch_size=batch_size, n_process=n_process):
+        yield _informative_lemmas_of_doc(doc)
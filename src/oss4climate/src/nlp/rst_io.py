@@ -1,6 +1,6 @@
 import warnings
 
-from oss4climate.src.nlp.html_io import find_all_links_in_html, html_to_search_plaintext
+from oss4climate.src.nlp.html_io import html_to_search_plaintext
 
 
 class RstParsingError(ValueError):
@@ -23,9 +23,27 @@ def __rst_to_html(rst_str: str) -> str:
     return x
 
 
+def __rst_to_doctree(rst_str: str):
+    from docutils.core import publish_doctree
+
+    try:
+        with warnings.catch_warnings():
+            x = publish_doctree(rst_str, parser_name="restructuredtext")
+    except Exception as e:
+        raise RstParsingError("Failed to parse RST file") from e
+    return x
+
+
 def find_all_links_in_rst(rst_str: str) -> list[str]:
-    x = __rst_to_html(rst_str)
-    links = find_all_links_in_html(x)
+    from docutils import nodes
+
+    # Walking the references of the document tree (instead of rendering and parsing HTML)
+    links = []
+    for node in __rst_to_doctree(rst_str).findall(nodes.reference):
+        if "refuri" in node:
+            links.append(node["refuri"])
+        elif "refid" in node:
+            links.append(f"#{node['refid']}")
     return links
 
 
@@ -2,15 +2,16 @@
 Module to perform basic search
 """
 
-import sys
 from datetime import UTC, datetime, timedelta
 from typing import Any, Iterable
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from tqdm import tqdm
 
 from oss4climate.src.log import log_warning
-from oss4climate.src.nlp.classifiers import tf_idf
+from oss4climate.src.nlp.classifiers import fit_tf_idf
 from oss4climate.src.parsers.licenses import license_category_from_license_name
 
 
@@ -21,47 +22,92 @@ def _lower_str(x: str, *args, **kwargs):
         return ""
 
 
-def _documents_loader(documents: pd.DataFrame | str | None, limit: int | None = None):
+def _license_categories(licenses: pd.Series) -> pd.Series:
+    if isinstance(licenses.dtype, pd.CategoricalDtype):
+        # (already mapped once per category, and na_action=None so that missing values are also mapped)
+        return licenses.map(license_category_from_license_name, na_action=None)
+    # Mapping each distinct license only once (as there are few licenses for many documents),
+    #  with missing values (code -1) mapped by the last element
+    codes, unique_licenses = pd.factorize(licenses)
+    categories = [license_category_from_license_name(i) for i in unique_licenses]
+    categories.append(license_category_from_license_name(None))
+    return pd.Series(np.array(categories, dtype=object)[codes], index=licenses.index)
+
+
+_DOCUMENT_COLUMNS = [
+    "id",
+    "name",
+    "organisation",
+    "url",
+    "website",
+    "optimised_description",
+    "license",
+    "latest_update",
+    "language",
+    "last_commit",
+    "open_pull_requests",
+    "master_branch",
+    "optimised_readme",
+    "is_fork",
+    "forked_from",
+    "readme_type",
+    "description",
+]
+_TEXT_COLUMNS = ["readme", "optimised_readme", "optimised_description"]
+
+
+def _read_feather_head(path: str, columns: list[str], n: int) -> pd.DataFrame:
+    # Only reading the first record batches of the file (instead of the whole file)
+    with pa.ipc.open_file(path) as reader:
+        schema = pa.schema(
+            [reader.schema.field(i) for i in columns], reader.schema.metadata
+        )
+        batches = []
+        n_read = 0
+        for i in range(reader.num_record_batches):
+            if n_read >= n:
+                break
+            batch = reader.get_batch(i).select(columns)
+            batches.append(batch)
+            n_read += batch.num_rows
+    table = pa.Table.from_batches(batches, schema=schema).slice(0, n)
+    return table.to_pandas()
+
+
+def _documents_loader(
+    documents: pd.DataFrame | str | None,
+    limit: int | None = None,
+    columns: list[str] | None = None,
+):
     if isinstance(documents, str):
         assert documents.endswith(
             ".feather"
         ), f"Only accepting .feather files (not {documents})"
-        # This line and the usage of pandas is part of an explicit optimisation scheme (for <512 MB in operations)
-        new_docs = pd.read_feather(
-            documents,
-            columns=[
-                "id",
-                "name",
-                "organisation",
-                "url",
-                "website",
-                "optimised_description",
-                "license",
-                "latest_update",
-                "language",
-                "last_commit",
-                "open_pull_requests",
-                "master_branch",
-                "optimised_readme",
-                "is_fork",
-                "forked_from",
-                "readme_type",
-                "description",
-            ],
-            # dtype_backend="pyarrow",
-        )
+        if columns is None:
+            columns = _DOCUMENT_COLUMNS
+        if limit is not None:
+            new_docs = _read_feather_head(documents, columns=columns, n=int(limit))
+        else:
+            # This line and the usage of pandas is part of an explicit optimisation scheme (for <512 MB in operations)
+            new_docs = pd.read_feather(
+                documents,
+                columns=columns,
+                # dtype_backend="pyarrow",
+            )
         sparse_cols = [
-            "description",
-            "language",
-            "license",
-            "optimised_readme",
-            "optimised_description",
+            i
+            for i in ["description", "optimised_readme", "optimised_description"]
+            if i in columns
         ]
         new_docs.loc[:, sparse_cols] = new_docs[sparse_cols].astype("Sparse[str]")
-
-        if limit is not None:
-            new_docs = new_docs.head(int(limit))
+        # Low cardinality columns (used for filtering) are stored as categories
+        categorical_cols = [
+            i for i in ["language", "license", "readme_type"] if i in columns
+        ]
+        new_docs[categorical_cols] = new_docs[categorical_cols].astype("category")
     else:
+        if columns is not None:
+            documents = documents[columns]
         if limit is not None:
             new_docs = documents.head(int(limit))
         else:
@@ -71,15 +117,20 @@ def _documents_loader(documents: pd.DataFrame | str | None, limit: int | None =
 
 class SearchResults:
     def __init__(
-        self, documents: pd.DataFrame | str | None = None, load_documents: bool = True
+        self,
+        documents: pd.DataFrame | str | None = None,
+        load_documents: bool = True,
+        columns: list[str] | None = None,
     ):
         """Instantiates a result search object
 
         :param documents: dataframe(language,description,readme,latest_update) or filename (.feather)
+        :param columns: columns to load (only reading these from file), defaults to None (all document columns)
         """
         self.__documents = None
+        self.__tf_idf = None
         if load_documents and documents:
-            self.load_documents(documents)
+            self.load_documents(documents, columns=columns)
 
     def iter_documents(
         self,
@@ -88,61 +139,96 @@ class SearchResults:
         memory_safe: bool = True,
         bytes_limit: int = 2e5,
         display_tqdm: bool = False,
+        columns: list[str] | None = None,
     ) -> Iterable[dict[str, Any]]:
-        new_docs = _documents_loader(documents=documents, limit=None)
+        """Iterates over documents (as dictionaries)
 
-        if display_tqdm:
-            iterator_to_run = tqdm(new_docs.iterrows())
-        else:
-            iterator_to_run = new_docs.iterrows()
-
-        if memory_safe:
-            # Using a protection against wild readmes (with an assumption that only the readmes do run wild)
-            for k, r in iterator_to_run:
-                n_size = sys.getsizeof(r)
-                if n_size < bytes_limit:
-                    yield r
-                else:
+        :param documents: dataframe or filename (.feather)
+        :param load_in_object_without_readme: whether to load the documents (without READMEs) after iterating, defaults to False
+        :param memory_safe: whether to truncate READMEs that would occupy too much memory, defaults to True
+        :param bytes_limit: size above which READMEs are truncated (if memory_safe), defaults to 2e5
+        :param display_tqdm: whether to display a progress bar, defaults to False
+        :param columns: columns to load (only reading these from file), defaults to None (all document columns)
+        :return: iterator over the documents
+        """
+        new_docs = _documents_loader(documents=documents, limit=None, columns=columns)
+
+        if memory_safe and "optimised_readme" in new_docs.columns:
+            # Using a protection against wild readmes (with an assumption that only the readmes do run wild),
+            #  truncating all of these at once before iterating (heuristic that every char takes a byte)
+            readmes = new_docs["optimised_readme"]
+            if isinstance(readmes.dtype, pd.SparseDtype):
+                readmes = readmes.sparse.to_dense()
+            too_long = (readmes.str.len() > bytes_limit).to_numpy()
+            if too_long.any():
+                labels = (
+                    new_docs["url"] if "url" in new_docs.columns else new_docs.index
+                )
+                for label, n in zip(labels[too_long], readmes[too_long].str.len()):
                     log_warning(
-                        f"Truncating readme of {r['url']} as it would occupy {n_size/1e6} MB in memory"
+                        f"Truncating readme of {label} as it would occupy {n/1e6} MB in memory"
                     )
-                    # TODO : this is a quickfix
-                    # Cutting the readme as it's likely to overflow memory
-                    readme_opt = r["optimised_readme"][
-                        : int(bytes_limit)
-                    ]  # heuristic that every char takes a byte
-                    new_docs.loc[k, "optimised_readme"] = readme_opt
-                    r["optimised_readme"] = readme_opt
-                    yield r
-        else:
-            for __, r in iterator_to_run:
-                yield r
+                readmes = readmes.copy()
+                readmes[too_long] = readmes[too_long].str.slice(0, int(bytes_limit))
+                # (replacing the whole column, as sparse columns can not be modified in place)
+                new_docs["optimised_readme"] = readmes.astype(
+                    new_docs["optimised_readme"].dtype
+                )
+
+        # Iterating over plain tuples (much faster than building a Series for each row with iterrows)
+        columns = new_docs.columns.to_list()
+        iterator_to_run = new_docs.itertuples(index=False, name=None)
+        if display_tqdm:
+            iterator_to_run = tqdm(iterator_to_run, total=len(new_docs))
+        for values in iterator_to_run:
+            yield dict(zip(columns, values))
 
         # Loading after iterating as a way to preserve RAM
         if load_in_object_without_readme:
-            cols_to_drop = [
-                i
-                for i in ["readme", "optimised_readme", "optimised_description"]
-                if i in new_docs.columns
-            ]
-            self.__documents = new_docs.drop(
-                columns=cols_to_drop,
-            )
-            self._fix_documents()
+            self.__set_documents_without_readme(new_docs)
+
+    def __set_documents_without_readme(self, new_docs: pd.DataFrame) -> None:
+        cols_to_drop = [i for i in _TEXT_COLUMNS if i in new_docs.columns]
+        self.__documents = new_docs.drop(
+            columns=cols_to_drop,
+        )
+        self._fix_documents()
+
+    def load_documents_without_readme(self, documents: pd.DataFrame | str) -> None:
+        """Loads documents without their READMEs (as done by 'iter_documents', but without iterating)
+
+        :param documents: dataframe or filename (.feather)
+        """
+        # Not reading the READMEs from file at all (as these are the largest columns)
+        new_docs = _documents_loader(
+            documents=documents,
+            limit=None,
+            columns=[i for i in _DOCUMENT_COLUMNS if i not in _TEXT_COLUMNS],
+        )
+        self.__set_documents_without_readme(new_docs)
 
     def _fix_documents(self):
+        self.__tf_idf = None
         # Ensuring that given columns are in datetime format
         self.__documents["latest_update"] = pd.to_datetime(
             self.__documents["latest_update"]
         )
+        # Nullable boolean flags (so that filtering on these does not compare objects)
+        if "is_fork" in self.__documents.columns:
+            self.__documents["is_fork"] = self.__documents["is_fork"].astype("boolean")
         # Adding a license_category column (if missing)
         if "license_category" not in self.__documents.keys():
-            self.__documents["license_category"] = self.__documents["license"].apply(
-                license_category_from_license_name
-            )
+            self.__documents["license_category"] = _license_categories(
+                self.__documents["license"]
+            ).astype("category")
 
-    def load_documents(self, documents: pd.DataFrame | str, limit: int | None = None):
-        new_docs = _documents_loader(documents=documents, limit=limit)
+    def load_documents(
+        self,
+        documents: pd.DataFrame | str,
+        limit: int | None = None,
+        columns: list[str] | None = None,
+    ):
+        new_docs = _documents_loader(documents=documents, limit=limit, columns=columns)
         if self.__documents:
             self.__documents += new_docs
         else:
@@ -157,44 +243,68 @@ class SearchResults:
 
     def __reindex(self) -> None:
         self.__documents = self.__documents.reset_index(drop=True)
+        # Dropping the categories left without documents (e.g. languages refined out)
+        for i in self.__documents.select_dtypes("category").columns:
+            self.__documents[i] = self.__documents[i].cat.remove_unused_categories()
+        # (the TF-IDF model no longer matches the documents)
+        self.__tf_idf = None
 
     def refine_by_languages(
         self, languages: list[str], include_none: bool = False
     ) -> None:
-        df_i = pd.concat(
-            [self.__documents.query(f"language=='{i}'") for i in languages]
-        )
+        # Single pass over the documents (instead of one query per language)
+        mask = self.__documents["language"].isin(languages)
         if include_none:
-            df_none = self.__documents[
-                self.__documents["language"].apply(lambda x: (x is None) or pd.isna(x))
-            ]
-            df_i = pd.concat([df_i, df_none])
+            mask |= self.__documents["language"].isna()
 
-        self.__documents = df_i
+        self.__documents = self.__documents[mask]
         self.__reindex()
 
     def refine_by_keyword(
         self, keyword: str, description: bool = True, readme: bool = True
     ) -> None:
         df_i = self.__documents
-        f = lambda x: keyword in _lower_str(x)
-        k_selected = []
+
+        def _f_contains_keyword(x: pd.Series) -> pd.Series:
+            # (missing and non-text values never match)
+            if isinstance(x.dtype, pd.SparseDtype):
+                x = x.sparse.to_dense()
+            return x.str.lower().str.contains(keyword, regex=False, na=False)
+
+        mask = pd.Series(False, index=df_i.index)
         if description:
-            k_selected = k_selected + df_i[df_i["description"].apply(f)].index.to_list()
+            mask |= _f_contains_keyword(df_i["description"])
         if readme:
-            k_selected = k_selected + df_i[df_i["readme"].apply(f)].index.to_list()
-        k_selected_unique = list(set(k_selected))
-        self.__documents = df_i.iloc[k_selected_unique].copy()
+            mask |= _f_contains_keyword(df_i["readme"])
+        self.__documents = df_i[mask].copy()
         self.__reindex()
 
+    def __fitted_tf_idf(self) -> tuple[Any, Any]:
+        # Fitted once on the current documents (instead of at every ordering)
+        if self.__tf_idf is None:
+            # Scoring on the texts of the documents (and not on the names of the columns)
+            text_columns = [
+                i for i in ["description", "readme"] if i in self.__documents
+            ]
+            texts = [
+                " ".join(_lower_str(i) for i in x)
+                for x in zip(*(self.__documents[i] for i in text_columns))
+            ]
+            self.__tf_idf = fit_tf_idf(texts)
+        return self.__tf_idf
+
     def order_by_relevance(self, keyword: str) -> None:
-        r_tfidf = tf_idf([_lower_str(i) for i in self.__documents])
+        vectorizer, tf_idf_matrix = self.__fitted_tf_idf()
         keyword = keyword.lower()
-        if keyword not in r_tfidf.keys():
+        i_keyword = vectorizer.vocabulary_.get(keyword)
+        if i_keyword is None:
             raise ValueError(f"Keyword ({keyword}) not found in documents")
-        ordered_results = r_tfidf[keyword].sort_values(ascending=False)
-        self.__documents = self.__documents.iloc[ordered_results.index]
+        scores = pd.Series(tf_idf_matrix[:, i_keyword].toarray().ravel())
+        order = scores.sort_values(ascending=False).index.to_numpy()
+        self.__documents = self.__documents.iloc[order]
         self.__reindex()
+        # Reordering the fitted model along with the documents (so that it is kept)
+        self.__tf_idf = (vectorizer, tf_idf_matrix[order])
 
     def refine_by_active_in_past_year(self) -> None:
         t_last = datetime.now(UTC) - timedelta(days=365)
@@ -202,7 +312,10 @@ class SearchResults:
         self.__reindex()
 
     def exclude_forks(self) -> None:
-        self.__documents = self.__documents[self.__documents["is_fork"] == False]
+        # (documents without fork information are excluded, as these are not known not to be forks)
+        self.__documents = self.__documents[
+            ~self.__documents["is_fork"].fillna(True).to_numpy(dtype=bool)
+        ]
         self.__reindex()
 
     @property
@@ -4,58 +4,156 @@ A minimal search engine implementation
 Taken from https://github.com/alexmolas/microsearch/blob/main/src/microsearch/engine.py
 """
 
+import os
+import pickle
 import string
 import sys
-from collections import defaultdict
-from functools import cached_property
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
 from math import log
-from typing import Any
+from typing import Any, Iterable
 
+import numpy as np
 import pandas as pd
 
 from oss4climate.src.log import log_warning
 
-
-def update_url_scores(old: dict[str, float], new: dict[str, float]):
-    for url, score in new.items():
-        if url in old:
-            old[url] += score
-        else:
-            old[url] = score
-    return old
+# Built once (instead of at every call, as strings are normalised for every indexed document)
+_PUNCTUATION_TO_SPACE = str.maketrans(string.punctuation, " " * len(string.punctuation))
 
 
 def normalize_string(input_string: str | Any) -> str:
     if not isinstance(input_string, str):
         return ""
     # Note : this currently does stuff beyond the lemmatizer optimisation (hence required to keep for well functioning)
-    translation_table = str.maketrans(string.punctuation, " " * len(string.punctuation))
-    string_without_punc = input_string.translate(translation_table)
+    string_without_punc = input_string.translate(_PUNCTUATION_TO_SPACE)
     string_without_double_spaces = " ".join(string_without_punc.split())
     return string_without_double_spaces.lower()
 
 
+@dataclass
+class _CompiledIndex:
+    """Index in a CSR layout (the postings of term_to_row[kw] are in [offsets[row], offsets[row+1]))"""
+
+    urls: np.ndarray
+    documents_length: np.ndarray
+    term_to_row: dict[str, int]
+    offsets: np.ndarray
+    doc_ids: np.ndarray
+    frequencies: np.ndarray
+
+
+def _int_defaultdict() -> defaultdict:
+    # Module-level factory (instead of a lambda) so that the index can be pickled
+    return defaultdict(int)
+
+
 class SearchEngine:
+    # Version of the indexed content (dumped indexes of other versions are not loaded)
+    INDEX_VERSION = 2
+
     def __init__(self, k1: float = 1.5, b: float = 0.75):
-        self._index: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
-        self._documents_length: dict[str, str] = {}
+        # The index is held in dictionaries while indexing, and in arrays once compiled (see 'compile')
+        self._index: dict[str, dict[str, int]] | None = defaultdict(_int_defaultdict)
+        self._documents_length: dict[str, int] | None = {}
+        self._compiled: _CompiledIndex | None = None
         self.k1 = k1
         self.b = b
 
+    def clear(self) -> None:
+        """Removes all indexed content (keeping the scoring parameters)"""
+        self._index = defaultdict(_int_defaultdict)
+        self._documents_length = {}
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        # Dropping the values derived from the index
+        if hasattr(self, "_avdl"):
+            del self._avdl
+        self._compiled = None
+
+    def _editable(self) -> None:
+        # Restoring the dictionaries (needed to index) if the index was compiled
+        if self._index is not None:
+            return
+        c = self._compiled
+        index = defaultdict(_int_defaultdict)
+        for kw, row in c.term_to_row.items():
+            start, end = c.offsets[row], c.offsets[row + 1]
+            index[kw] = defaultdict(
+                int,
+                zip(
+                    c.urls[c.doc_ids[start:end]].tolist(),
+                    c.frequencies[start:end].tolist(),
+                ),
+            )
+        self._index = index
+        self._documents_length = dict(zip(c.urls.tolist(), c.documents_length.tolist()))
+        self._invalidate()
+
+    def dump(self, path: str, metadata: dict | None = None) -> None:
+        """Saves the index to a pickle file, so that it can be reloaded without re-indexing
+
+        :param path: path of the file to write
+        :param metadata: information on the indexed source (checked upon loading), defaults to None
+        """
+        state = {
+            "metadata": metadata,
+            "version": self.INDEX_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "compiled": self.compile(),
+        }
+        with open(path, "wb") as fp:
+            pickle.dump(state, fp, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path: str, metadata: dict | None = None) -> bool:
+        """Loads an index previously saved with 'dump' (replacing the current content)
+
+        :param path: path of the file to read
+        :param metadata: expected information on the indexed source, defaults to None
+        :return: True if the index was loaded, False if the file is missing or was built from another source
+        """
+        if not os.path.exists(path):
+            return False
+        with open(path, "rb") as fp:
+            state = pickle.load(fp)
+        if (
+            (state.get("metadata") != metadata)
+            or (state.get("version") != self.INDEX_VERSION)
+            or ("compiled" not in state)
+        ):
+            return False
+        self.clear()
+        self.k1 = state["k1"]
+        self.b = state["b"]
+        self._index = None
+        self._documents_length = None
+        self._compiled = state["compiled"]
+        return True
+
     @property
     def indexed_items(self) -> list[str]:
+        if self._documents_length is None:
+            return self._compiled.urls.tolist()
         return list(self._documents_length.keys())
 
-    @cached_property
+    @property
     def number_of_items(self) -> int:
+        if self._documents_length is None:
+            return len(self._compiled.urls)
         return len(self._documents_length)
 
     @property
     def avdl(self) -> float:
         if not hasattr(self, "_avdl"):
-            self._avdl = (
-                sum(list(self._documents_length.values())) / self.number_of_items
-            )
+            if self._documents_length is None:
+                total_length = self._compiled.documents_length.sum()
+            else:
+                total_length = sum(list(self._documents_length.values()))
+            self._avdl = total_length / self.number_of_items
         return self._avdl
 
     def idf(self, kw: str) -> float:
@@ -64,6 +162,9 @@ class SearchEngine:
         return log((n - n_kw + 0.5) / (n_kw + 0.5) + 1)
 
     def bm25(self, kw: str) -> dict[str, float]:
+        if self._index is None:
+            # Compiled index (scored by the vectorised implementation below)
+            return self.score_tokens((normalize_string(kw),)).to_dict()
         result = {}
         idf_score = self.idf(kw)
         avdl = self.avdl
@@ -75,13 +176,87 @@ class SearchEngine:
             result[url] = idf_score * numerator / denominator
         return result
 
+    def compile(self) -> _CompiledIndex:
+        """Converts the index to arrays (used for scoring, and less memory intensive than dictionaries)
+
+        Note: the dictionaries are released, and only restored if further content is indexed
+
+        :return: the compiled index
+        """
+        if self._compiled is not None:
+            return self._compiled
+        urls = list(self._documents_length.keys())
+        doc_id_by_url = {url: i for i, url in enumerate(urls)}
+        postings = [p for p in self._index.values() if len(p) > 0]
+        n_postings = sum(len(p) for p in postings)
+        self._compiled = _CompiledIndex(
+            urls=np.array(urls, dtype=object),
+            documents_length=np.fromiter(
+                self._documents_length.values(), dtype=np.int64, count=len(urls)
+            ),
+            term_to_row={
+                kw: i
+                for i, kw in enumerate(
+                    kw for kw, p in self._index.items() if len(p) > 0
+                )
+            },
+            offsets=np.cumsum([0] + [len(p) for p in postings], dtype=np.int64),
+            doc_ids=np.fromiter(
+                (doc_id_by_url[url] for p in postings for url in p.keys()),
+                dtype=np.int32,
+                count=n_postings,
+            ),
+            frequencies=np.fromiter(
+                (f for p in postings for f in p.values()),
+                dtype=np.int32,
+                count=n_postings,
+            ),
+        )
+        self._index = None
+        self._documents_length = None
+        return self._compiled
+
+    @staticmethod
+    def tokenize(query: str) -> tuple[str, ...]:
+        """Splits a query into the keywords used for scoring
+
+        :param query: query to split
+        :return: tuple of keywords
+        """
+        return tuple(normalize_string(query).split(" "))
+
     def search(self, query: str) -> pd.Series:
-        keywords = normalize_string(query).split(" ")
-        url_scores: dict[str, float] = {}
-        for kw in keywords:
-            kw_urls_score = self.bm25(kw)
-            url_scores = update_url_scores(url_scores, kw_urls_score)
-        return pd.Series(list(url_scores.values()), index=list(url_scores.keys()))
+        return self.score_tokens(self.tokenize(query))
+
+    def score_tokens(self, keywords: tuple[str, ...]) -> pd.Series:
+        """Scores the indexed URLs for keywords (as obtained from 'tokenize')
+
+        :param keywords: keywords to score for
+        :return: series of scores indexed by URL (only for URLs matching at least one keyword)
+        """
+        c = self.compile()
+        n = len(c.urls)
+        scores = np.zeros(n, dtype=np.float64)
+        matched = np.zeros(n, dtype=bool)
+        if n > 0:
+            avdl = c.documents_length.sum() / n
+            for kw in keywords:
+                row = c.term_to_row.get(kw)
+                if row is None:
+                    continue
+                start, end = c.offsets[row], c.offsets[row + 1]
+                ids = c.doc_ids[start:end]
+                freq = c.frequencies[start:end]
+                # Same operations (and order) as in bm25, vectorised over the postings of the keyword
+                idf_score = log((n - (end - start) + 0.5) / ((end - start) + 0.5) + 1)
+                numerator = freq * (self.k1 + 1)
+                denominator = freq + self.k1 * (
+                    1 - self.b + self.b * c.documents_length[ids] / avdl
+                )
+                # Doc ids are unique within a posting list, hence fancy indexing is safe
+                scores[ids] += idf_score * numerator / denominator
+                matched[ids] = True
+        return pd.Series(scores[matched], index=c.urls[matched])
 
     def index(
         self,
@@ -98,47 +273,121 @@ class SearchEngine:
             more than 'bytes_limit' - this is useful for avoiding errors with tricky READMEs), defaults to True
         :param bytes_limit: limit of number of bytes of index extension (used wnen 'memory_safe' is True), defaults to 5e5
         """
-        if isinstance(content, str):
-            self._documents_length[url] = len(content)
-        else:
-            if pd.isna(content):
-                self._documents_length[url] = 0
+        self.index_many(
+            [url], [content], memory_safe=memory_safe, bytes_limit=bytes_limit
+        )
+
+    def index_many(
+        self,
+        urls: Iterable[str],
+        contents: Iterable[str],
+        memory_safe: bool = True,
+        bytes_limit: int = 5e5,
+    ) -> None:
+        """Method to index contents for multiple URLs in one pass (see 'index' for details)
+
+        :param urls: URLs to use as index keys
+        :param contents: contents to index for the URLs (in the same order as 'urls')
+        :param memory_safe: whether to adopt a memory safe, defaults to True
+        :param bytes_limit: limit of number of bytes of index extension (used wnen 'memory_safe' is True), defaults to 5e5
+        """
+        self._editable()
+        index = self._index
+        documents_length = self._documents_length
+        for url, content in zip(urls, contents):
+            if isinstance(content, str):
+                documents_length[url] = len(content)
             else:
-                log_warning(
-                    f"Uncovered indexing type ({content.__class__.__name__} - skipping indexing of {url})"
-                )
-                self._documents_length[url] = 0
-        words = normalize_string(content).split(" ")
-        if memory_safe:
-            new_words_indexed = dict()
-            for word in words:
-                if word not in new_words_indexed:
-                    new_words_indexed[word] = 0
+                if pd.isna(content):
+                    documents_length[url] = 0
                 else:
-                    new_words_indexed[word] += 1
-            index_size_increase = sys.getsizeof(new_words_indexed)
-            if index_size_increase > bytes_limit:
-                # To avoid size exploding
-                log_warning(
-                    f"Skipping indexing of URL {url} as it would yield a {round(index_size_increase/1e6,1)} MB size increase"
-                )
+                    log_warning(
+                        f"Uncovered indexing type ({content.__class__.__name__} - skipping indexing of {url})"
+                    )
+                    documents_length[url] = 0
+            # Counting the occurrences of each word in one pass
+            new_words_indexed = Counter(normalize_string(content).split(" "))
+            if memory_safe:
+                index_size_increase = sys.getsizeof(new_words_indexed)
+                if index_size_increase > bytes_limit:
+                    # To avoid size exploding
+                    log_warning(
+                        f"Skipping indexing of URL {url} as it would yield a {round(index_size_increase/1e6,1)} MB size increase"
+                    )
+                else:
+                    for k, v in new_words_indexed.items():
+                        index[k][url] = v
             else:
                 for k, v in new_words_indexed.items():
-                    self._index[k][url] = v
-        else:
-            for word in words:
-                self._index[word][url] += 1
-        if hasattr(self, "_avdl"):
-            del self._avdl
+                    index[k][url] += v
+        # Dropping the values derived from the index (once for all documents)
+        self._invalidate()
 
     @property
     def index_size(self) -> int:
+        if self._index is None:
+            c = self._compiled
+            return sum(
+                i.nbytes
+                for i in [c.documents_length, c.offsets, c.doc_ids, c.frequencies]
+            ) + sys.getsizeof(c.term_to_row)
         return sys.getsizeof(self._index)
 
-    def bulk_index(self, documents: list[tuple[str, str]]):
-        for url, content in documents:
-            self.index(url, content)
+    def bulk_index(self, documents: list[tuple[str, str]], n_workers: int = 1):
+        """Indexes multiple documents
+
+        :param documents: list of (URL, content) to index
+        :param n_workers: number of processes to index with (shards are indexed separately, then merged), defaults to 1
+        """
+        if n_workers > 1 and len(documents) > 1:
+            shard_size = -(-len(documents) // n_workers)
+            shards = [
+                documents[i : i + shard_size]
+                for i in range(0, len(documents), shard_size)
+            ]
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                for shard_engine in executor.map(
+                    _index_shard, shards, repeat(self.k1), repeat(self.b)
+                ):
+                    self.merge(shard_engine)
+        else:
+            self.index_many(
+                [url for url, __ in documents], [content for __, content in documents]
+            )
+
+    def merge(self, other: "SearchEngine") -> "SearchEngine":
+        """Adds the content indexed in another search engine (which takes precedence for URLs indexed in both)
+
+        :param other: search engine to merge into this one
+        :return: this search engine
+        """
+        self._editable()
+        other._editable()
+        for word, postings in other._index.items():
+            self._index[word].update(postings)
+        self._documents_length.update(other._documents_length)
+        self._invalidate()
+        return self
 
     def get_urls(self, keyword: str) -> dict[str, int]:
         keyword = normalize_string(keyword)
+        if self._index is None:
+            c = self._compiled
+            row = c.term_to_row.get(keyword)
+            if row is None:
+                return {}
+            start, end = c.offsets[row], c.offsets[row + 1]
+            return dict(
+                zip(
+                    c.urls[c.doc_ids[start:end]].tolist(),
+                    c.frequencies[start:end].tolist(),
+                )
+            )
         return self._index[keyword]
+
+
+def _index_shard(documents: list[tuple[str, str]], k1: float, b: float) -> SearchEngine:
+    # Module-level function, so that it can be run in a worker process
+    se = SearchEngine(k1=k1, b=b)
+    se.bulk_index(documents)
+    return se
@@ -3,14 +3,18 @@ Module for parsers and web I/O
 """
 
 import json
+import os
+import re
 import time
 from dataclasses import dataclass, field
 from datetime import timedelta
+from functools import lru_cache
 from typing import Any
 
 import pandas as pd
 import requests
 import tomllib
+from requests.adapters import HTTPAdapter
 from tomlkit import document, dump
 
 from oss4climate.src.database import load_from_database, save_to_database
@@ -30,6 +34,8 @@ class RateLimitError(RuntimeError):
 
 
 WEB_SESSION = requests.Session()
+# Keeping more connections alive per host (as queries can be run concurrently)
+WEB_SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
 ERROR_404_MARKER = "404"
 
 
@@ -114,62 +120,46 @@ def cached_web_get_text(
     )
 
 
+# Patterns of URLs that are not repositories (precompiled, as these are checked on every URL found)
+_GITHUB_NON_REPOSITORY_PATH_PREFIX = re.compile(
+    r"https://github\.com/(?:settings|user-attachments|sponsors)/"
+)
+_GITHUB_NON_REPOSITORY_PATH = re.compile(
+    r"/(?:"
+    # Specific endings
+    r"(?:wiki|discussions|issues|milestones|projects|pulls|releases|tags)\Z"
+    r"|actions"
+    r"|security/policy"
+    # Specific sub-paths
+    r"|(?:wiki|discussions|issues|milestone|projects|pull|releases|tag|-|assets"
+    r"|badges|blob|commit|labels|graphs|public|raw|workflows)/"
+    r")"
+)
+_GITLAB_NON_REPOSITORY_PATH = re.compile(r"/(?:-/|blob/|badges/|examples\Z)")
+
+
 def url_qualifies(x: str) -> bool:
     if url_base_matches_domain(x, "github.com"):
-        if (
-            x.startswith("https://github.com/settings/")
-            or x.startswith("https://github.com/user-attachments/")
-            or x.startswith("https://github.com/sponsors/")
-            or x.startswith("https://github.com/settings/")
-        ):
+        if _GITHUB_NON_REPOSITORY_PATH_PREFIX.match(x):
             return False
-        elif (
-            x.endswith("/wiki")
-            or ("/wiki/" in x)
-            or x.endswith("/discussions")
-            or ("/discussions/" in x)
-            or x.endswith("/issues")
-            or ("/issues/" in x)
-            or x.endswith("/milestones")
-            or ("/milestone/" in x)
-            or x.endswith("/projects")
-            or ("/projects/" in x)
-            or x.endswith("/pulls")
-            or ("/pull/" in x)
-            or x.endswith("/releases")
-            or ("/releases/" in x)
-            or x.endswith("/tags")
-            or ("/tag/" in x)
-            # Specific endings
-            or ("/actions" in x)
-            or ("/security/policy" in x)
-            # Specific sub-paths
-            or ("/-/" in x)
-            or ("/assets/" in x)
-            or ("/badges/" in x)
-            or ("/blob/" in x)
-            or ("/commit/" in x)
-            or ("/labels/" in x)
-            or ("/graphs/" in x)
-            or ("/public/" in x)
-            or ("/raw/" in x)
-            or ("/workflows/" in x)
-        ):
+        elif _GITHUB_NON_REPOSITORY_PATH.search(x):
             return False
         else:
             return True
     elif x.startswith("https://gitlab.com/"):
-        if (
-            ("/-/" in x)
-            or ("/blob/" in x)
-            or ("/badges/" in x)
-            or x.endswith("/examples")
-        ):
+        if _GITLAB_NON_REPOSITORY_PATH.search(x):
             return False
     # If hit nothing up thil here, then it's valid
     return True
 
 
+@lru_cache(maxsize=4)
+def _load_toml(toml_file_path: str, mtime_ns: int) -> dict:
+    # The modification time is part of the cache key, so that changes to the file are reloaded
+    with open(toml_file_path, "rb") as f:
+        return tomllib.load(f)
+
+
 @dataclass
 class ParsingTargets:
     """
@@ -254,10 +244,9 @@ class ParsingTargets:
         self.unknown = sorted_list_of_cleaned_urls(self.unknown)
         self.invalid = sorted_list_of_cleaned_urls(self.invalid)
 
-    def __included_in_valid_targets(self, url: str) -> bool:
-        return (
-            url
-            in self.github_organisations
+    def __valid_targets(self) -> set[str]:
+        return set(
+            self.github_organisations
             + self.github_repositories
             + self.gitlab_groups
             + self.gitlab_projects
@@ -301,45 +290,44 @@ class ParsingTargets:
         self.ensure_sorted_cleaned_and_unique_elements()
         # Ensuring that only valid targets are used
         self.ensure_targets_validity()
-        # Removing all repos that are listed in organisations/groups
+        # Removing all repos that are listed in organisations/groups (using sets for fast lookups)
+        github_organisations = set(self.github_organisations)
         self.github_repositories = [
-            i for i in self.github_repositories if i not in self.github_organisations
+            i for i in self.github_repositories if i not in github_organisations
         ]
+        gitlab_groups = set(self.gitlab_groups)
         self.gitlab_projects = [
-            i for i in self.gitlab_projects if i not in self.gitlab_groups
+            i for i in self.gitlab_projects if i not in gitlab_groups
         ]
+        bitbucket_projects = set(self.bitbucket_projects)
         self.bitbucket_repositories = [
-            i for i in self.bitbucket_repositories if i not in self.bitbucket_projects
+            i for i in self.bitbucket_repositories if i not in bitbucket_projects
         ]
         # Removing unknown repos
-        self.unknown = [
-            i for i in self.unknown if not self.__included_in_valid_targets(i)
-        ]
-        self.invalid = [
-            i for i in self.invalid if not self.__included_in_valid_targets(i)
-        ]
+        valid_targets = self.__valid_targets()
+        self.unknown = [i for i in self.unknown if i not in valid_targets]
+        self.invalid = [i for i in self.invalid if i not in valid_targets]
 
     @staticmethod
     def from_toml(toml_file_path: str) -> "ParsingTargets":
         if not toml_file_path.endswith(".toml"):
             raise ValueError("Input must be a TOML file")
 
-        with open(toml_file_path, "rb") as f:
-            x = tomllib.load(f)
-
-        for i in ["github_hosted", "gitlab_hosted", "bitbucket_hosted"]:
-            if x.get(i) is None:
-                x[i] = {}
+        # Parsed once per version of the file (the lists are copied, as targets are modified in place)
+        x = _load_toml(toml_file_path, os.stat(toml_file_path).st_mtime_ns)
+        github = x.get("github_hosted") or {}
+        gitlab = x.get("gitlab_hosted") or {}
+        bitbucket = x.get("bitbucket_hosted") or {}
 
         return ParsingTargets(
-            github_organisations=x["github_hosted"].get("organisations", []),
-            github_repositories=x["github_hosted"].get("repositories", []),
-            gitlab_groups=x["gitlab_hosted"].get("groups", []),
-            gitlab_projects=x["gitlab_hosted"].get("projects", []),
-            bitbucket_projects=x["bitbucket_hosted"].get("projects", []),
-            bitbucket_repositories=x["bitbucket_hosted"].get("repositories", []),
-            unknown=x["dropped_targets"].get("urls", []),
-            invalid=x["dropped_targets"].get("invalid_urls", []),
+            github_organisations=list(github.get("organisations", [])),
+            github_repositories=list(github.get("repositories", [])),
+            gitlab_groups=list(gitlab.get("groups", [])),
+            gitlab_projects=list(gitlab.get("projects", [])),
+            bitbucket_projects=list(bitbucket.get("projects", [])),
+            bitbucket_repositories=list(bitbucket.get("repositories", [])),
+            unknown=list(x["dropped_targets"].get("urls", [])),
+            invalid=list(x["dropped_targets"].get("invalid_urls", [])),
         )
 
     def to_toml(self, toml_file_path: str) -> None:
@@ -1,20 +1,19 @@
+import heapq
 import os
 from contextlib import asynccontextmanager
 from datetime import datetime
+from operator import itemgetter
+from threading import Thread
 from typing import Optional
 
 from fastapi import FastAPI, Request
 from fastapi.responses import RedirectResponse
 from fastapi.staticfiles import StaticFiles
 
-from oss4climate.src.config import FILE_OUTPUT_OPTIMISED_LISTING_FEATHER, SETTINGS
-from oss4climate.src.log import log_info, log_warning
+from oss4climate.src.config import SETTINGS
+from oss4climate.src.log import log_info
 from oss4climate_app.config import STATIC_FILES_PATH, URL_APP, URL_FAVICON
-from oss4climate_app.src.data_io import (
-    SEARCH_ENGINE_DESCRIPTIONS,
-    SEARCH_ENGINE_READMES,
-    SEARCH_RESULTS,
-)
+from oss4climate_app.src.data_io import prewarm_search_cache, refresh_data
 from oss4climate_app.src.log_activity import log_landing
 from oss4climate_app.src.routers import api, ui
 from oss4climate_app.src.templates import render_template
@@ -62,31 +61,12 @@ async def lifespan(app: FastAPI):
     # Initialising error logging at app start
     initialise_error_logging()
     log_info("Starting app")
-    if not os.path.exists(FILE_OUTPUT_OPTIMISED_LISTING_FEATHER):
-        # Only importing this heavier part if needed
-        from oss4climate.scripts import listing_search
-
-        log_warning("- Listing not found, downloading again")
-        listing_search.download_listing_data_for_app()
-    log_info("- Loading documents")
-    log_info(" -- Feather file loaded")
-    for r in SEARCH_RESULTS.iter_documents(
-        FILE_OUTPUT_OPTIMISED_LISTING_FEATHER,
-        load_in_object_without_readme=True,  # As documents are used later for display
-        display_tqdm=True,
-        memory_safe=True,  # essential in environments with little memory
-    ):
-        # Skip repos with missing info
-        for k in ["optimised_readme", "optimised_description"]:
-            if r[k] is None:
-                r[k] = ""
-        SEARCH_ENGINE_DESCRIPTIONS.index(
-            url=r["url"], content=r["optimised_description"]
-        )
-        SEARCH_ENGINE_READMES.index(r["url"], content=r["optimised_readme"])
+    refresh_data()
     log_info(" -- All repos loaded")
     ui.repository_index_characteristics_from_documents()
     log_info(" -- All metrics loaded")
+    # Running popular searches in the background (to serve these from cache)
+    Thread(target=prewarm_search_cache, daemon=True).start()
     yield
     log_info("Exiting app")
 
@@ -103,10 +83,8 @@ A search engine for open-source code for climate applications
 
 
 def get_top_urls(scores_dict: dict, n: int):
-    sorted_urls = sorted(scores_dict.items(), key=lambda x: x[1], reverse=True)
-    top_n_urls = sorted_urls[:n]
-    top_n_dict = dict(top_n_urls)
-    return top_n_dict
+    # Partial sort (equivalent to sorting in descending order and keeping the first n)
+    return dict(heapq.nlargest(n, scores_dict.items(), key=itemgetter(1)))
 
 
 @app.get("/")
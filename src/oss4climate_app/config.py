@@ -2,6 +2,7 @@ import pathlib
 import uuid
 
 from oss4climate.src.config import (
+    FILE_OUTPUT_DIR,
     URL_LISTING_CSV,
     URL_LISTING_FEATHER,
     URL_LISTINGS_INDEX,
@@ -11,6 +12,10 @@ _script_dir = pathlib.Path(__file__).resolve().parent
 TEMPLATES_PATH = _script_dir / "templates"
 STATIC_FILES_PATH = _script_dir / "static"
 
+# Search indexes (cached to avoid re-indexing the documents at every start)
+FILE_SEARCH_INDEX_DESCRIPTIONS = f"{FILE_OUTPUT_DIR}/search_index_descriptions.pkl"
+FILE_SEARCH_INDEX_READMES = f"{FILE_OUTPUT_DIR}/search_index_readmes.pkl"
+
 # To prevent caching between versions (this doesn't work too well across instances, but does the job for now)
 APP_VERSION = str(uuid.uuid4())
 
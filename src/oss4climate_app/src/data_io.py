@@ -1,13 +1,16 @@
 import os
 from dataclasses import dataclass
+from threading import Lock
 from datetime import date
 from functools import lru_cache
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 from oss4climate.src.config import (
     FILE_OUTPUT_OPTIMISED_LISTING_FEATHER,
+    SETTINGS,
 )
 from oss4climate.src.helpers import sorted_list_of_unique_elements
 from oss4climate.src.log import log_info, log_warning
@@ -18,19 +21,32 @@ from oss4climate.src.nlp.plaintext import (
 from oss4climate.src.nlp.search import SearchResults
 from oss4climate.src.nlp.search_engine import SearchEngine
 from oss4climate.src.parsers.licenses import LicenseCategoriesEnum
+from oss4climate_app.config import (
+    FILE_SEARCH_INDEX_DESCRIPTIONS,
+    FILE_SEARCH_INDEX_READMES,
+)
+from oss4climate_app.src.database import most_frequent_search_terms
 
 SEARCH_ENGINE_DESCRIPTIONS = SearchEngine()
 SEARCH_ENGINE_READMES = SearchEngine()
 SEARCH_RESULTS = SearchResults()
+# Held while the data is refreshed, and by background searches (so that these are not cached from outdated data)
+_DATA_LOCK = Lock()
 
 
 def _f_none_to_unknown(x: str | date | None) -> str:
-    if x is None:
+    # (missing values of categorical columns are NaN rather than None)
+    if x is None or pd.isna(x):
         return "(unknown)"
     else:
         return str(x)
 
 
+def _unique_values(x: pd.Series) -> list:
+    # Missing values are kept as None (categorical columns hold these as NaN)
+    return [None if pd.isna(i) else i for i in x.unique().tolist()]
+
+
 @dataclass
 class _RepositoryIndexCharacteristics:
     unique_licenses: list[str]
@@ -48,15 +64,16 @@ def repository_index_characteristics_from_documents(
             raise RuntimeError(
                 "Documents must be loaded when no input for 'documents' is provided"
             )
-        licenses = SEARCH_RESULTS.documents_without_readme["license"].unique().tolist()
-        languages = (
-            SEARCH_RESULTS.documents_without_readme["language"].unique().tolist()
-        )
+        licenses = _unique_values(SEARCH_RESULTS.documents_without_readme["license"])
+        languages = _unique_values(SEARCH_RESULTS.documents_without_readme["language"])
     else:
         licenses = []
         languages = []
         n = 0
-        for r in SEARCH_RESULTS.iter_documents(documents):
+        # (only reading the columns needed here)
+        for r in SEARCH_RESULTS.iter_documents(
+            documents, memory_safe=False, columns=["license", "language"]
+        ):
             n += 1
             licenses.append(_f_none_to_unknown(r["license"]))
             languages.append(_f_none_to_unknown(r["language"]))
@@ -81,90 +98,188 @@ def n_repositories_indexed():
 NLP_MODEL = get_spacy_english_model()
 
 
-@lru_cache(maxsize=10)
+@lru_cache(maxsize=1)
+def _documents_for_search() -> pd.DataFrame:
+    # Computed once (instead of at every search), sorted by URL for a stable ordering of equal scores
+    return SEARCH_RESULTS.documents_without_readme.sort_values("url", kind="stable")
+
+
+@lru_cache(maxsize=1)
+def _urls_of_documents_for_search() -> tuple[np.ndarray, pd.Index]:
+    # Codes of the URLs in the documents and index of unique URLs (which keeps its hash table across searches)
+    return pd.factorize(_documents_for_search()["url"])
+
+
+@lru_cache(maxsize=1)
+def _lowercase_names_of_documents_for_search() -> tuple[pd.Series, pd.Series]:
+    # Lowercased names and organisations (missing values as "nan"/"none", as with str())
+    df = _documents_for_search()
+    return tuple(df[i].astype(str).str.lower() for i in ["name", "organisation"])
+
+
+@lru_cache(maxsize=1)
+def display_values_of_documents() -> pd.DataFrame:
+    """Display values of the license and last commit of the documents (computed once, not at every request)
+
+    :return: dataframe with the same index as the documents
+    """
+    df = SEARCH_RESULTS.documents_without_readme[["license", "last_commit"]]
+    return df.astype("string").fillna("(unknown)")
+
+
+@lru_cache(maxsize=100)
 def search_for_results(query: Optional[str] = None) -> pd.DataFrame:
     if (query is None) or (len(query) < 1):
-        df_x = SEARCH_RESULTS.documents_without_readme
-        df_x["score"] = 1
-        df_x.sort_values("name", inplace=True)
-        return df_x
+        # Not modifying the loaded documents in place (as these are shared with all searches)
+        return SEARCH_RESULTS.documents_without_readme.assign(score=1).sort_values(
+            "name"
+        )
 
     lemmatized_query = " ".join(
         reduce_to_informative_lemmas(query, nlp_model=NLP_MODEL)
     )
     log_info(f"Searching for {query} / lemmatized to {lemmatized_query}")
 
-    res_desc = SEARCH_ENGINE_DESCRIPTIONS.search(lemmatized_query)
-    res_readme = SEARCH_ENGINE_READMES.search(lemmatized_query)
+    # Tokenizing once for both search engines
+    keywords = SearchEngine.tokenize(lemmatized_query)
+    res_desc = SEARCH_ENGINE_DESCRIPTIONS.score_tokens(keywords)
+    res_readme = SEARCH_ENGINE_READMES.score_tokens(keywords)
 
-    df_combined = (
-        res_desc.to_frame("description")
-        .merge(
-            res_readme.to_frame("readme"),
-            how="outer",
-            left_index=True,
-            right_index=True,
-        )
-        .fillna(0)
-        .infer_objects(copy=False)  # to avoid warning on downcasting
-    )
+    # Combining scores directly on the URL index (URLs missing in one of the results count as 0)
+    combined_scores = res_desc.mul(10).add(res_readme, fill_value=0)
 
-    # Also checking for keywords in name
-    def _f_score_in_name(x):
-        kw = query.lower().split(" ")
-        res = 0
-        x_lower = str(x).lower()
+    df_documents = _documents_for_search()
+    url_codes, unique_urls = _urls_of_documents_for_search()
+    positions = unique_urls.get_indexer(combined_scores.index)
+    found = positions >= 0
+    score_by_url = np.zeros(len(unique_urls))
+    score_by_url[positions[found]] = combined_scores.to_numpy()[found]
+    # Also checking for keywords in name and organisation (one vectorised scan per keyword)
+    kw = query.lower().split(" ")
+    kw = [i for i in kw if len(i) > 3]  # To reduce noise (quick and dirty)
+    scores = score_by_url[url_codes]
+    for names in _lowercase_names_of_documents_for_search():
+        n_in_name = np.zeros(len(names), dtype=np.int64)
         for i in kw:
-            if len(i) > 3:  # To reduce noise (quick and dirty)
-                if i in x_lower:
-                    res += 1
-        return res
-
-    df_combined["score"] = df_combined["description"] * 10 + df_combined["readme"]
-    df_out = SEARCH_RESULTS.documents_without_readme.merge(
-        df_combined[["score"]],
-        how="outer",
-        left_on="url",
-        right_index=True,
-    )
-
-    df_out["score"] = (
-        df_out["score"].astype(float).fillna(0)
-        + df_out["name"].apply(_f_score_in_name) * 10
-        + df_out["organisation"].apply(_f_score_in_name) * 10
-    )
+            n_in_name += names.str.contains(i, regex=False).to_numpy()
+        scores = scores + n_in_name * 10
 
     # Focus only on relevant outputs and carry out filtering and duplicate removal
-    df_out.query("score>0", inplace=True)
-    df_out.sort_values(by="score", ascending=False, inplace=True)
+    relevant = np.flatnonzero(scores > 0)
+    # Ordering by decreasing score on the scores only (so that the rows are only taken once),
+    #  with ties kept in the order of the documents (i.e. by URL)
+    order = relevant[np.argsort(-scores[relevant], kind="stable")]
+    df_out = df_documents.take(order).assign(score=scores[order])
     df_out.drop_duplicates(subset=["url"], inplace=True)
     return df_out
 
 
+@lru_cache(maxsize=64)
+def search_for_filtered_results(
+    query: Optional[str] = None,
+    language: Optional[str] = None,
+    license_category: Optional[LicenseCategoriesEnum] = None,
+    exclude_forks: bool = False,
+    active_since: Optional[date] = None,
+) -> pd.DataFrame:
+    """Search results refined by filters (cached, so that pagination does not filter again)
+
+    :param query: search query
+    :param language: language to restrict to (no restriction if None)
+    :param license_category: license category to restrict to (no restriction if None)
+    :param exclude_forks: whether to exclude forks, defaults to False
+    :param active_since: date from which the last commit must be (no restriction if None)
+    :return: dataframe of results
+    """
+    df_out = search_for_results(query)
+    if language is not None:
+        df_out = df_out[df_out["language"] == language]
+    if license_category is not None:
+        df_out = df_out[df_out["license_category"] == license_category]
+    if exclude_forks:
+        df_out = df_out[~df_out["is_fork"].fillna(True).to_numpy(dtype=bool)]
+    if active_since is not None:
+        df_out = df_out[df_out["last_commit"] >= active_since]
+    return df_out
+
+
+def prewarm_search_cache(n_queries: int = 50) -> None:
+    """Runs the most frequently logged searches, so that they are served from cache
+
+    :param n_queries: maximum number of searches to run, defaults to 50
+    """
+    queries = []
+    for i in most_frequent_search_terms(n_queries):
+        query = i.removeprefix("API:")  # API searches are logged with a prefix
+        if query not in ["", "None"] and query not in queries:
+            queries.append(query)
+    for query in queries:
+        with _DATA_LOCK:
+            search_for_results(query)
+    log_info(f" -- Search cache prewarmed with {len(queries)} queries")
+
+
 def clear_cache():
     repository_index_characteristics_from_documents.cache_clear()
+    _documents_for_search.cache_clear()
+    _urls_of_documents_for_search.cache_clear()
+    _lowercase_names_of_documents_for_search.cache_clear()
+    display_values_of_documents.cache_clear()
     search_for_results.cache_clear()
+    search_for_filtered_results.cache_clear()
+
+
+def _documents_signature() -> dict:
+    # Used to check that cached search indexes were built from the current listing
+    stats = os.stat(FILE_OUTPUT_OPTIMISED_LISTING_FEATHER)
+    return {"size": stats.st_size, "mtime_ns": stats.st_mtime_ns}
 
 
 def refresh_data(force_refresh: bool = False):
+    with _DATA_LOCK:
+        _load_data(force_refresh=force_refresh)
+        # (cached values were computed from the previous data)
+        clear_cache()
+
+
+def _load_data(force_refresh: bool = False):
     if force_refresh or not os.path.exists(FILE_OUTPUT_OPTIMISED_LISTING_FEATHER):
         from oss4climate.scripts import listing_search
 
         log_warning("- Listing not found, downloading again")
         listing_search.download_listing_data_for_app()
     log_info("- Loading documents")
-    # Make sure to coordinate the below with the app start procedure
+    signature = _documents_signature()
+    if SEARCH_ENGINE_DESCRIPTIONS.load(
+        FILE_SEARCH_INDEX_DESCRIPTIONS, metadata=signature
+    ) and SEARCH_ENGINE_READMES.load(FILE_SEARCH_INDEX_READMES, metadata=signature):
+        log_info(" -- Search indexes loaded from cache")
+        SEARCH_RESULTS.load_documents_without_readme(
+            FILE_OUTPUT_OPTIMISED_LISTING_FEATHER
+        )
+        return
+
+    SEARCH_ENGINE_DESCRIPTIONS.clear()
+    SEARCH_ENGINE_READMES.clear()
+    descriptions = []
+    readmes = []
     for r in SEARCH_RESULTS.iter_documents(
         FILE_OUTPUT_OPTIMISED_LISTING_FEATHER,
-        load_in_object_without_readme=True,
+        load_in_object_without_readme=True,  # As documents are used later for display
         display_tqdm=True,
-        memory_safe=True,
+        memory_safe=True,  # essential in environments with little memory
     ):
         # Skip repos with missing info
         for k in ["optimised_readme", "optimised_description"]:
             if r[k] is None:
                 r[k] = ""
-        SEARCH_ENGINE_DESCRIPTIONS.index(
-            url=r["url"], content=r["optimised_description"]
-        )
-        SEARCH_ENGINE_READMES.index(r["url"], content=r["optimised_readme"])
+        descriptions.append((r["url"], r["optimised_description"]))
+        readmes.append((r["url"], r["optimised_readme"]))
+    n_workers = SETTINGS.APP_INDEXING_WORKERS
+    SEARCH_ENGINE_DESCRIPTIONS.bulk_index(descriptions, n_workers=n_workers)
+    SEARCH_ENGINE_READMES.bulk_index(readmes, n_workers=n_workers)
+    SEARCH_ENGINE_DESCRIPTIONS.compile()
+    SEARCH_ENGINE_READMES.compile()
+    log_info(" -- Caching search indexes")
+    SEARCH_ENGINE_DESCRIPTIONS.dump(FILE_SEARCH_INDEX_DESCRIPTIONS, metadata=signature)
+    SEARCH_ENGINE_READMES.dump(FILE_SEARCH_INDEX_READMES, metadata=signature)
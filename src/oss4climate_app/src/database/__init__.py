@@ -7,7 +7,7 @@ from datetime import datetime
 from typing import Optional
 
 import pandas as pd
-from sqlmodel import Field, Session, SQLModel, create_engine
+from sqlmodel import Field, Session, SQLModel, create_engine, func, select
 
 from oss4climate.src.config import SETTINGS
 
@@ -66,3 +66,21 @@ def dump_database_request_log_as_csv() -> str:
 
 def dump_database_search_log_as_csv() -> str:
     return pd.read_sql_table(SearchLog.__tablename__, _ENGINE).to_csv(index=False)
+
+
+def most_frequent_search_terms(n: int) -> list[str]:
+    """Returns the search terms most frequently logged
+
+    :param n: maximum number of search terms to return
+    :return: list of search terms (by decreasing frequency)
+    """
+    n_searches = func.count(SearchLog.id)
+    with open_database_session() as session:
+        res = session.exec(
+            select(SearchLog.search_term)
+            .where(SearchLog.search_term.is_not(None))
+            .group_by(SearchLog.search_term)
+            .order_by(n_searches.desc(), SearchLog.search_term)
+            .limit(n)
+        ).all()
+    return list(res)
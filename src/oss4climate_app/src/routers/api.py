@@ -13,7 +13,6 @@ from oss4climate.src.config import SETTINGS
 from oss4climate.src.log import log_info
 from oss4climate_app.config import URL_CODE_REPOSITORY, URL_DATA_FEATHER
 from oss4climate_app.src.data_io import (
-    clear_cache,
     refresh_data,
     search_for_results,
 )
@@ -126,8 +125,7 @@ async def _refresh_data(key: Optional[str] = None):
             status_code=403,
         )
     log_info("DATA refreshing START")
-    refresh_data(force_refresh=True)
-    clear_cache()
+    refresh_data(force_refresh=True)  # (also clearing the caches)
     log_info("DATA refreshing END")
     return PlainTextResponse("Data was successfully refreshed")
 
@@ -17,8 +17,9 @@ from oss4climate_app.config import (
     URL_FEEDBACK_FORM,
 )
 from oss4climate_app.src.data_io import (
+    display_values_of_documents,
     repository_index_characteristics_from_documents,
-    search_for_results,
+    search_for_filtered_results,
     unique_license_categories,
 )
 from oss4climate_app.src.log_activity import log_search
@@ -29,13 +30,6 @@ from . import listing_credits
 app = APIRouter(include_in_schema=False)
 
 
-def _f_none_to_unknown(x: str | date | None) -> str:
-    if x is None:
-        return "(unknown)"
-    else:
-        return str(x)
-
-
 def _render_ui_template(
     request: Request, template_file: str, content: dict | None = None
 ):
@@ -86,24 +80,23 @@ async def search_results(
 ):
     if query:
         query = query.strip().lower()
-    df_out = search_for_results(query)
-
-    # Adding a primitive refinment mechanism by language (not implemented in the most effective manner)
-    if language and (language != "*"):
-        df_out = df_out[df_out["language"] == language]
+    # Refining the results (cached together with the search)
     if license_category and (license_category != "*"):
         try:
             enum_license_category = LicenseCategoriesEnum[license_category]
         except KeyError:
             raise ValueError("Invalid license category")
-
-        df_out = df_out[df_out["license_category"] == enum_license_category]
-
-    if exclude_forks:
-        df_out = df_out[df_out["is_fork"] == False]
-    if exclude_inactive:
-        t_limit = date.today() - timedelta(days=365)
-        df_out = df_out[df_out["last_commit"] >= t_limit]
+    else:
+        enum_license_category = None
+    df_out = search_for_filtered_results(
+        query,
+        language=language if (language and (language != "*")) else None,
+        license_category=enum_license_category,
+        exclude_forks=bool(exclude_forks),
+        active_since=(
+            (date.today() - timedelta(days=365)) if exclude_inactive else None
+        ),
+    )
 
     if offset is None:
         df_shown = df_out.head(n_results)
@@ -114,8 +107,10 @@ async def search_results(
     df_shown = df_shown.drop(
         columns=["score"]  # Dropping scores, as it's not informative to the user
     )
-    for i in ["license", "last_commit"]:
-        df_shown.loc[:, i] = df_shown[i].apply(_f_none_to_unknown)
+    df_display_values = display_values_of_documents()
+    df_shown[df_display_values.columns] = df_display_values.loc[df_shown.index]
+    # Categories can't hold the display values set below
+    df_shown = df_shown.astype({"language": object})
 
     n_found = len(df_shown)
     n_total_found = len(df_out)
@@ -9,7 +9,49 @@ def test_app():
         assert tc.get("/", follow_redirects=False).status_code == 200
         assert tc.get("/ui/search").status_code == 200
         assert tc.get("/ui/results?query=iot&license=*&language=*").status_code == 200
+        # Listing all results must not alter subsequent searches
+        assert tc.get("/ui/results").status_code == 200
+        assert tc.get("/api/search?query=solar").status_code == 200
 
         # SEO endpoints test
         for i in ["robots.txt", "sitemap.xml"]:
             assert tc.get(f"/{i}").status_code == 200
+
+
+def test_search_for_results_orders_ties_by_url(monkeypatch):
+    import pandas as pd
+
+    from oss4climate.src.nlp.search import SearchResults
+    from oss4climate.src.nlp.search_engine import SearchEngine
+
+    from .src import data_io
+
+    urls = [f"https://github.com/org/{i}" for i in ["c", "a", "d", "b"]]
+    descriptions = ["solar", "solar", "solar solar", "solar"]
+    documents = SearchResults()
+    documents.load_documents(
+        pd.DataFrame(
+            {
+                "name": ["x1", "x2", "x3", "x4"],
+                "organisation": ["org"] * 4,
+                "url": urls,
+                "language": ["Python"] * 4,
+                "license": [None] * 4,
+                "description": descriptions,
+                "readme": [""] * 4,
+                "latest_update": ["2024-01-01"] * 4,
+            }
+        )
+    )
+    se_descriptions = SearchEngine()
+    se_descriptions.bulk_index(list(zip(urls, descriptions)))
+    monkeypatch.setattr(data_io, "SEARCH_RESULTS", documents)
+    monkeypatch.setattr(data_io, "SEARCH_ENGINE_DESCRIPTIONS", se_descriptions)
+    monkeypatch.setattr(data_io, "SEARCH_ENGINE_READMES", SearchEngine())
+    data_io.clear_cache()
+    try:
+        res = data_io.search_for_results("solar")
+    finally:
+        data_io.clear_cache()
+    # Highest score first, then tied scores ordered by URL
+    assert res["url"].to_list() == [urls[2], urls[1], urls[3], urls[0]]
@@ -1,5 +1,12 @@
-from oss4climate.src.nlp.html_io import find_all_links_in_html
-from oss4climate.src.nlp.markdown_io import find_all_links_in_markdown
+from oss4climate.src.nlp.html_io import (
+    find_all_links_in_html,
+    html_to_search_plaintext,
+)
+from oss4climate.src.nlp.markdown_io import (
+    find_all_links_in_markdown,
+    markdown_to_search_plaintext,
+)
+from oss4climate.src.nlp.plaintext import extract_urls
 from oss4climate.src.nlp.rst_io import find_all_links_in_rst
 
 
@@ -46,3 +53,47 @@ __ x1_
         )
         == res
     )
+
+
+def test_html_to_search_plaintext():
+    html = """
+<html>
+    <head>
+        <style>p { color: red; }</style>
+        <script>var x = "hidden";</script>
+    </head>
+    <body>
+        <p>Solar &amp; wind<br>forecasting</p>
+        <pre><code>import pandas</code></pre>
+    </body>
+</html>
+"""
+    out = html_to_search_plaintext(html)
+    assert "Solar & wind" in out
+    assert "forecasting" in out
+    assert "hidden" not in out
+    assert "pandas" not in out
+    assert "pandas" in html_to_search_plaintext(html, remove_code=False)
+
+
+def test_markdown_to_search_plaintext_removes_code():
+    md = """
+Solar forecasting
+
+```python
+import pandas
+print("code")
+```
+
+Use `pip install` to install.
+"""
+    out = markdown_to_search_plaintext(md)
+    assert "Solar forecasting" in out
+    assert "pandas" not in out
+    assert "pip" not in out
+    assert "pandas" in markdown_to_search_plaintext(md, remove_code=False)
+
+
+def test_extract_urls(github_organisation_url, github_repo_url):
+    txt = f"See {github_organisation_url}. Also ({github_repo_url}) and nothing else."
+    assert extract_urls(txt) == [github_organisation_url, github_repo_url]
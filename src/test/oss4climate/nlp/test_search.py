@@ -0,0 +1,30 @@
+import pandas as pd
+
+from oss4climate.src.nlp.search import SearchResults
+
+
+def test_statistics_after_refining(tmp_path, github_repo_url, github_repo_url_2):
+    path = str(tmp_path / "listing.feather")
+    pd.DataFrame(
+        {
+            "name": ["a", "b", "c"],
+            "organisation": ["x", "x", "y"],
+            "url": [github_repo_url, github_repo_url_2, "https://github.com/y/c"],
+            "language": ["Python", "Julia", "R"],
+            "license": ["MIT License", "Apache License 2.0", None],
+            "description": ["solar", "wind", "grid"],
+            "readme": ["", "", ""],
+            "latest_update": pd.to_datetime(["2024-01-01"] * 3),
+            "is_fork": [False, True, None],
+        }
+    ).to_feather(path)
+
+    x = SearchResults()
+    x.load_documents(path, columns=list(pd.read_feather(path).columns))
+    x.refine_by_languages(["Python"])
+    stats = x.statistics
+    assert stats["repositories"] == 1
+    assert stats["n_languages"] == 1
+    # Languages and licenses refined out are not listed (with a count of 0)
+    assert stats["language"].to_dict() == {"Python": 1}
+    assert stats["license"].to_dict() == {"MIT License": 1}
@@ -0,0 +1,51 @@
+from oss4climate.src.nlp.search_engine import SearchEngine
+
+
+def test_dump_and_load(tmp_path, github_repo_url, github_repo_url_2):
+    se = SearchEngine()
+    se.index(github_repo_url, "Solar forecasting in Python")
+    se.index(github_repo_url_2, "Grid modelling and solar power")
+    expected = se.search("solar grid")
+
+    path = str(tmp_path / "index.pkl")
+    se.dump(path, metadata={"version": 1})
+
+    se_loaded = SearchEngine()
+    assert not se_loaded.load(path, metadata={"version": 2})
+    assert se_loaded.load(path, metadata={"version": 1})
+    assert se_loaded.search("solar grid").to_dict() == expected.to_dict()
+
+    se_loaded.clear()
+    assert se_loaded.indexed_items == []
+
+
+def test_search_matches_bm25(github_repo_url, github_repo_url_2):
+    se = SearchEngine()
+    se.index(github_repo_url, "Solar forecasting in Python with solar data")
+    se.index(github_repo_url_2, "Grid modelling and solar power")
+    # Every occurrence of a word is counted
+    assert se.get_urls("solar") == {github_repo_url: 2, github_repo_url_2: 1}
+    expected = se.bm25("solar")
+    for url, score in se.bm25("grid").items():
+        expected[url] = expected.get(url, 0) + score
+    assert se.search("solar grid").to_dict() == expected
+
+    # Indexing after a search must invalidate the compiled index
+    se.index("https://github.com/a/b", "Grid")
+    assert "https://github.com/a/b" in se.search("grid").index
+
+
+def test_bulk_index_in_parallel(github_repo_url, github_repo_url_2):
+    documents = [
+        (github_repo_url, "Solar forecasting in Python"),
+        (github_repo_url_2, "Grid modelling and solar power"),
+        ("https://github.com/a/b", "Grid"),
+    ]
+    se = SearchEngine()
+    se.bulk_index(documents)
+    se_parallel = SearchEngine()
+    se_parallel.bulk_index(documents, n_workers=2)
+    assert se_parallel.indexed_items == se.indexed_items
+    assert (
+        se_parallel.search("solar grid").to_dict() == se.search("solar grid").to_dict()
+    )
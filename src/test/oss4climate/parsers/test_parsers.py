@@ -0,0 +1,13 @@
+from oss4climate.src.parsers import url_qualifies
+
+
+def test_url_qualifies(github_repo_url, gitlab_repo_url):
+    assert url_qualifies(github_repo_url)
+    assert url_qualifies(gitlab_repo_url)
+    for i in ["/issues", "/issues/1", "/blob/main/README.md", "/actions"]:
+        assert not url_qualifies(github_repo_url + i)
+    # Only endings (and not prefixes) are excluded for these
+    assert url_qualifies(github_repo_url + "/issues-tracker")
+    assert not url_qualifies("https://github.com/sponsors/Pierre-VF")
+    assert not url_qualifies(gitlab_repo_url + "/-/tree/main")
+    assert not url_qualifies(gitlab_repo_url + "/examples")
@@ -1,3 +1,5 @@
+import pandas as pd
+
 from oss4climate.src.helpers import (
     cleaned_url,
     sorted_list_of_unique_elements,
@@ -15,3 +17,10 @@ def test_f(github_repo_url):
     assert cleaned_url(github_repo_url + " abc#content") == github_repo_url
 
     assert sorted_list_of_unique_elements([2, 1, 2, 4, 3, 4]) == [1, 2, 3, 4]
+
+
+def test_sorted_list_of_unique_elements_with_missing_values():
+    # Missing values (including pd.NA of nullable columns) are placed last
+    x = pd.Series(["b", pd.NA, "a", "b"], dtype="string")
+    assert sorted_list_of_unique_elements(x) == ["a", "b", pd.NA]
+    assert sorted_list_of_unique_elements(["b", None, "a"]) == ["a", "b", None]